@@ -1,9 +1,38 @@
-import random
+import argparse
 import pygame
 import sys
 import math
+import threading
 import time
 
+from gomoku_engine import (
+    AI,
+    AI_ALPHABETA,
+    AI_MINIMAX,
+    COLS,
+    EMPTY,
+    FREESTYLE,
+    GameRecord,
+    PLAYER,
+    Ponderer,
+    RecordWriter,
+    Replay,
+    ROWS,
+    RULES,
+    WIN_LENGTH,
+    Board,
+    SearchAborted,
+    SearchControl,
+    ThreatSolver,
+    TranspositionTable,
+    alphabeta,
+    check_win,
+    find_winning_move,
+    iterative_deepening,
+    load_book,
+    minimax,
+)
+
 
 # Initialize Pygame Package for GUI
 pygame.init()
@@ -11,7 +40,6 @@ pygame.mixer.init()
 
 # Constants to be used later in code
 SIZE = WIDTH, HEIGHT = 600, 600
-ROWS, COLS = 15, 15
 SQUARE_SIZE = WIDTH // COLS
 LINE_WIDTH = 2
 WHITE = (255, 255, 255)
@@ -19,14 +47,13 @@ BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
-EMPTY = 0
-PLAYER = 1 # Human (in Human vs AI mode)
-AI = 2 # AI (in Human vs AI mode)
-AI_MINIMAX = 1  # AI using Minimax (in AI vs AI mode)
-AI_ALPHABETA = 2 # AI using ALPHABETA (in AI vs AI mode)
-PLAYER1 = 'X'  # AI Minimax
-PLAYER2 = 'O'  # AI Alpha-Beta
-DEPTH = 2  # Low Number for more speed between each move
+DEPTH = 2  # Fixed depth for the AI vs AI comparison
+AI_TIME_LIMIT = 1.5  # Seconds the Human vs AI search may spend per move
+AI_MOVE_DELAY = 0.5  # Seconds between moves in AI vs AI mode
+MESSAGE_SECONDS = 3  # How long win/lose messages stay on screen
+FPS = 60
+BOOK_PATH = 'opening_book.bin'  # Built with: python -m gomoku_engine.book build opening_book.bin
+GAME_RECORDS_PATH = 'games.txt'  # Finished games are appended here, see gomoku_engine/records.py
 
 # Initialize Screen Dispaly, Backgrounds and Sounds
 screen = pygame.display.set_mode(SIZE)
@@ -39,11 +66,16 @@ button_click_sound = pygame.mixer.Sound('Sounds/Mouse_Click.mp3')
 win_sound = pygame.mixer.Sound('Sounds/Win_Sound.wav')
 lose_sound = pygame.mixer.Sound('Sounds/Lose_Sound.wav')
 
-# Initialize Board and Fonts
-board = [[EMPTY for _ in range(COLS)] for _ in range(ROWS)]
+# Initialize Board, Opening Book (None if not built) and Fonts
+board = Board(ROWS, COLS)
+opening_book = load_book(BOOK_PATH)
 font = pygame.font.SysFont('Arial', 60)
 small_font = pygame.font.SysFont('Arial', 40)
 MENU_FONT = pygame.font.SysFont('Arial', 40)
+THINKING_FONT = pygame.font.SysFont('Arial', 28)
+clock = pygame.time.Clock()
+message = None  # (surface, rect, hide_at) of the message on screen
+menu_base = None  # Menu background with its title, built on first use
 
 # Class for Creating a Button
 class Button:
@@ -55,15 +87,16 @@ class Button:
         self.text_color = text_color
         self.font = pygame.font.SysFont('Arial', 36)
         self.is_hovered = True
+        # The label never changes, so it is rendered once
+        self.text_surface = self.font.render(self.text, True, self.text_color)
+        self.text_pos = self.text_surface.get_rect(center=self.button.center)
 
     # Function for drawing a button
     def draw(self, place):
         color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(place, color, self.button, border_radius=100)
         pygame.draw.rect(place, BLACK, self.button, 2, border_radius=100)
-        text = self.font.render(self.text, True, self.text_color)
-        text_pos = text.get_rect(center=self.button.center)
-        place.blit(text, text_pos)
+        place.blit(self.text_surface, self.text_pos)
 
     def check_hover(self, mouse_pos):
         self.is_hovered = self.button.collidepoint(mouse_pos)
@@ -74,38 +107,119 @@ class Button:
             return self.button.collidepoint(mouse_pos)
         return False
 
-# Function for Drawing a Board
-def draw_board():
-    screen.blit(background, (0, 0))
-    for row in range(ROWS):
-        pygame.draw.line(screen, BLACK, (0, row * SQUARE_SIZE), (WIDTH, row * SQUARE_SIZE), LINE_WIDTH)
-    for col in range(COLS):
-        pygame.draw.line(screen, BLACK, (col * SQUARE_SIZE, 0), (col * SQUARE_SIZE, HEIGHT), LINE_WIDTH)
-    for row in range(ROWS):
-        for col in range(COLS):
-            if board[row][col] == PLAYER or board[row][col] == AI_MINIMAX:  # Draw Red Circle for human or Minimax AI
-                pygame.draw.circle(screen, RED,(col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),SQUARE_SIZE // 3)
-            elif board[row][col] == AI or board[row][col] == AI_ALPHABETA:  # Draw Blue circle for Regular AI or Alpha-Beta AI
-                pygame.draw.circle(screen, BLUE,(col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2),SQUARE_SIZE // 3)
-def display_message(text, y_pos=30):
-    font = pygame.font.SysFont('Arial', 60)
-    message = font.render(text, True, (0, 128, 0))
-    text_button = message.get_rect(center=(WIDTH // 2, y_pos))
-    screen.blit(message, text_button)
-    pygame.display.update()
-    pygame.time.wait(3000)  # Show Message for 3 seconds
+# Draws the game screen incrementally: the wood background and grid are composited once,
+# stones are pre-rendered sprites, and each frame only the cells and overlays (buttons,
+# messages, thinking indicator) that changed are redrawn and passed to display.update.
+class BoardRenderer:
+    def __init__(self):
+        self.base = background.copy()
+        for row in range(board.rows):
+            pygame.draw.line(self.base, BLACK, (0, row * SQUARE_SIZE), (WIDTH, row * SQUARE_SIZE), LINE_WIDTH)
+        for col in range(board.cols):
+            pygame.draw.line(self.base, BLACK, (col * SQUARE_SIZE, 0), (col * SQUARE_SIZE, HEIGHT), LINE_WIDTH)
+        # Red for human or Minimax AI, blue for regular AI or Alpha-Beta AI
+        self.stone_sprites = {PLAYER: self.make_stone(RED), AI: self.make_stone(BLUE)}
+        self.invalidate()
+
+    @staticmethod
+    def make_stone(color):
+        sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (SQUARE_SIZE // 2, SQUARE_SIZE // 2), SQUARE_SIZE // 3)
+        return sprite
+
+    # Forces a full redraw on the next frame (after the pause screen or a new game)
+    def invalidate(self):
+        self.shown_moves = []
+        self.shown_overlays = {}
+        self.full_redraw = True
+
+    # Puts back the board (background, grid and stones) inside `rect`
+    def restore(self, rect):
+        screen.blit(self.base, rect.topleft, rect)
+        for row in range(max(0, rect.top // SQUARE_SIZE), min(board.rows, (rect.bottom - 1) // SQUARE_SIZE + 1)):
+            for col in range(max(0, rect.left // SQUARE_SIZE), min(board.cols, (rect.right - 1) // SQUARE_SIZE + 1)):
+                stone = board[row][col]
+                if stone != EMPTY:
+                    screen.blit(self.stone_sprites[stone], (col * SQUARE_SIZE, row * SQUARE_SIZE))
+
+    # overlays: (key, state, rect, draw) in drawing order; an overlay is redrawn when its
+    # state or rect changes or when something under it was redrawn
+    def render(self, overlays):
+        moves = board.history
+        if self.full_redraw:
+            dirty = [screen.get_rect()]
+            self.restore(dirty[0])
+            self.full_redraw = False
+        else:
+            dirty = []
+            same = 0
+            while same < min(len(moves), len(self.shown_moves)) and moves[same] == self.shown_moves[same]:
+                same += 1
+            for row, col in self.shown_moves[same:] + moves[same:]:
+                dirty.append(pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+            current = {key: (state, rect) for key, state, rect, _ in overlays}
+            for key, (state, rect) in self.shown_overlays.items():
+                if current.get(key) != (state, rect):
+                    dirty.append(rect)
+            for key, (state, rect) in current.items():
+                if self.shown_overlays.get(key) != (state, rect):
+                    dirty.append(rect)
+            for rect in dirty:
+                self.restore(rect)
+        self.shown_moves = list(moves)
+        self.shown_overlays = {}
+        for key, state, rect, draw in overlays:
+            if rect.collidelist(dirty) != -1:
+                draw()
+            self.shown_overlays[key] = (state, rect)
+        if dirty:
+            pygame.display.update(dirty)
+
+renderer = BoardRenderer()
+
+# Switches to a size x size board with the given win length and rule variant
+def configure(size=ROWS, win_length=WIN_LENGTH, rule=FREESTYLE):
+    global SQUARE_SIZE, board, renderer
+    SQUARE_SIZE = WIDTH // size
+    board = Board(size, size, win_length, rule)
+    renderer = BoardRenderer()
+
+def button_overlay(button):
+    return button.text, button.is_hovered, button.button, lambda: button.draw(screen)
 
-def display_menu():
-    screen.blit(menu_background, (0, 0))
+def display_message(text, y_pos=30):
+    global message
+    rendered = font.render(text, True, (0, 128, 0))
+    message = (rendered, rendered.get_rect(center=(WIDTH // 2, y_pos)), time.time() + MESSAGE_SECONDS)
+
+def hide_message():
+    global message
+    message = None
+
+def message_overlays():
+    if message is not None and time.time() < message[2]:
+        rendered, rect, hide_at = message
+        return [('message', hide_at, rect, lambda: screen.blit(rendered, rect))]
+    return []
+
+def build_menu_base():
+    menu_base = menu_background.copy()
     title_background = pygame.Surface((WIDTH - 100, 60), pygame.SRCALPHA)
     title_background.fill((0, 0, 0, 150))
     title_background_rect = title_background.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-    screen.blit(title_background, title_background_rect)
+    menu_base.blit(title_background, title_background_rect)
     title = MENU_FONT.render("Choose a game mode:", True, WHITE)
     title_shape = title.get_rect(center=(WIDTH // 2, HEIGHT // 4))
     shadow = MENU_FONT.render("Choose a game mode:", True, (50, 50, 50))
-    screen.blit(shadow, (title_shape.x + 2, title_shape.y + 2))
-    screen.blit(title, title_shape)
+    menu_base.blit(shadow, (title_shape.x + 2, title_shape.y + 2))
+    menu_base.blit(title, title_shape)
+    return menu_base
+
+def display_menu():
+    global menu_base
+    if menu_base is None:
+        menu_base = build_menu_base()
+    screen.blit(menu_base, (0, 0))
 
     button_width = WIDTH // 2
     button_height = 60
@@ -115,10 +229,11 @@ def display_menu():
     human_vs_ai_button = Button("Human vs AI", WIDTH // 2 - button_width // 2,  y_pos, button_width, button_height,(76, 175, 80), (50, 150, 50))
     ai_vs_ai_button = Button("AI vs AI", WIDTH // 2 - button_width // 2,  y_pos + button_height + padding, button_width, button_height, (33, 150, 243), (20, 120, 220))
     exit_button = Button("Exit", WIDTH // 2 - button_width // 2,  y_pos + 2 * (button_height + padding), button_width, button_height,   (244, 67, 54), (200, 50, 50))
+    buttons = [human_vs_ai_button, ai_vs_ai_button, exit_button]
 
-    human_vs_ai_button.draw(screen)
-    ai_vs_ai_button.draw(screen)
-    exit_button.draw(screen)
+    for button in buttons:
+        button.check_hover(pygame.mouse.get_pos())
+        button.draw(screen)
     pygame.display.update()
 
     # Wait for user input
@@ -126,17 +241,15 @@ def display_menu():
     game_mode = None
     while waiting_for_choice:
         mouse_pos = pygame.mouse.get_pos()
-        human_vs_ai_button.check_hover(mouse_pos)
-        ai_vs_ai_button.check_hover(mouse_pos)
-        exit_button.check_hover(mouse_pos)
-        screen.blit(menu_background, (0, 0))
-        screen.blit(title_background, title_background_rect)
-        screen.blit(shadow, (title_shape.x + 2, title_shape.y + 2))
-        screen.blit(title, title_shape)
-        human_vs_ai_button.draw(screen)
-        ai_vs_ai_button.draw(screen)
-        exit_button.draw(screen)
-        pygame.display.update()
+        # Only buttons whose hover state changed are redrawn
+        changed = [button.button for button in buttons if button.is_hovered != button.check_hover(mouse_pos)]
+        for button in buttons:
+            if button.button in changed:
+                screen.blit(menu_base, button.button.topleft, button.button)
+                button.draw(screen)
+        if changed:
+            pygame.display.update(changed)
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -168,6 +281,7 @@ def show_pause_screen():
 
     paused = True
     while paused:
+        clock.tick(FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -179,281 +293,243 @@ def show_pause_screen():
     return True
 def play_sound():
     button_click_sound.play()
-def reset_game():
-    global board
-    board = [[EMPTY for _ in range(COLS)] for _ in range(ROWS)]
-
-def is_valid_move(row, col):
-    return board[row][col] == EMPTY
-
-def check_win(player):
-    for row in range(ROWS):
-        for col in range(COLS - 4):
-            if all(board[row][col + i] == player for i in range(5)):
-                return True
-    for row in range(ROWS - 4):
-        for col in range(COLS):
-            if all(board[row + i][col] == player for i in range(5)):
-                return True
-    for row in range(ROWS - 4):
-        for col in range(COLS - 4):
-            if all(board[row + i][col + i] == player for i in range(5)):
-                return True
-    for row in range(4, ROWS):
-        for col in range(COLS - 4):
-            if all(board[row - i][col + i] == player for i in range(5)):
-                return True
-    return False
+# Appends the game on the board to the game record file
+def save_game():
+    with RecordWriter(GAME_RECORDS_PATH) as writer:
+        writer.write(GameRecord.from_board(board))
 
-def get_valid_moves():
-    moves = []
-    for row in range(ROWS):
-        for col in range(COLS):
-            if board[row][col] == EMPTY:
-                if any(board[r][c] != EMPTY for r in range(max(0, row - 1), min(ROWS, row + 2)) for c in
-                       range(max(0, col - 1), min(COLS, col + 2))):
-                    moves.append((row, col))
-    return moves if moves else [(ROWS // 2, COLS // 2)]
-
-def evaluate_board(player):
-    opponent = PLAYER if player == AI else AI
-    player_score = score_lines(player)
-    opponent_score = score_lines(opponent)
-    return player_score - opponent_score
-
-def score_lines(player):
-    score = 0
-    lines = []
-    # Horizontal, vertical, diagonal, anti-diagonal
-    for row in range(ROWS):
-        for col in range(COLS - 4):
-            lines.append([board[row][col + i] for i in range(5)])
-    for row in range(ROWS - 4):
-        for col in range(COLS):
-            lines.append([board[row + i][col] for i in range(5)])
-    for row in range(ROWS - 4):
-        for col in range(COLS - 4):
-            lines.append([board[row + i][col + i] for i in range(5)])
-    for row in range(4, ROWS):
-        for col in range(COLS - 4):
-            lines.append([board[row - i][col + i] for i in range(5)])
-
-    for line in lines:
-        count = line.count(player)
-        if count == 5:
-            score += 100000
-        elif count == 4 and line.count(EMPTY) == 1:
-            score += 10000
-        elif count == 3 and line.count(EMPTY) == 2:
-            score += 1000
-        elif count == 2 and line.count(EMPTY) == 3:
-            score += 100
-        elif count == 1 and line.count(EMPTY) == 4:
-            score += 10
-    return score
-
-def minimax(depth, maximizingPlayer):
-    if check_win(AI):
-        return None, None, 100000
-    elif check_win(PLAYER):
-        return None, None, -100000
-    elif depth == 0:
-        return None, None, evaluate_board(AI)
-
-    valid_moves = get_valid_moves()
-    best_move = None
-
-    if maximizingPlayer:
-        max_utility = -math.inf
-        for move in valid_moves:
-            row, col = move
-            board[row][col] = AI
-            _, _, utility = minimax(depth - 1, False)
-            board[row][col] = EMPTY
-            if utility > max_utility:
-                max_utility = utility
-                best_move = (row, col)
-        return *best_move, max_utility
-    else:
-        min_utility = math.inf
-        for move in valid_moves:
-            row, col = move
-            board[row][col] = PLAYER
-            _, _, utility = minimax(depth - 1, True)
-            board[row][col] = EMPTY
-            if utility < min_utility:
-                min_utility = utility
-                best_move = (row, col)
-        return *best_move, min_utility
-
-
-def alphabeta(depth, alpha, beta, maximizingPlayer):
-    if check_win(PLAYER2):
-        return None, None, 100000
-    elif check_win(PLAYER1):
-        return None, None, -100000
-    elif depth == 0:
-        return None, None, evaluate_board(PLAYER2)
-
-    valid_moves = get_valid_moves()
-    best_moves = []
-
-    if maximizingPlayer:
-        max_utility = -math.inf
-        for move in valid_moves:
-            row, col = move
-            board[row][col] = PLAYER2
-            _, _, utility = alphabeta(depth - 1, alpha, beta, False)
-            board[row][col] = EMPTY
-            if utility > max_utility:
-                max_utility = utility
-                best_moves = [(row, col)]
-            elif utility == max_utility:
-                best_moves.append((row, col))
-            alpha = max(alpha, utility)
-            if beta <= alpha:
-                break
-        return *random.choice(best_moves), max_utility
-    else:
-        min_utility = math.inf
-        for move in valid_moves:
-            row, col = move
-            board[row][col] = PLAYER1
-            _, _, utility = alphabeta(depth - 1, alpha, beta, True)
-            board[row][col] = EMPTY
-            if utility < min_utility:
-                min_utility = utility
-                best_moves = [(row, col)]
-            elif utility == min_utility:
-                best_moves.append((row, col))
-            beta = min(beta, utility)
-            if beta <= alpha:
-                break
-        return *random.choice(best_moves), min_utility
-
-def find_winning_move(player):
-    for row in range(ROWS):
-        for col in range(COLS):
-            if board[row][col] == EMPTY:
-                board[row][col] = player
-                if check_win(player):
-                    board[row][col] = EMPTY
-                    return row, col
-                board[row][col] = EMPTY
-    return None
+def reset_game():
+    global message
+    board.reset()
+    message = None
+    renderer.invalidate()
+
+# Runs one AI search in a background thread so the window keeps drawing and reacting.
+# The search function gets a stop_event keyword argument; cancel() sets it and waits.
+class AIThinker:
+    def __init__(self):
+        self.thread = None
+        self.stop_event = None
+        self.result = None
+        self.started_at = 0
+
+    def start(self, search, *args):
+        self.cancel()
+        self.stop_event = threading.Event()
+        self.result = None
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._run, args=(search, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, search, args):
+        try:
+            self.result = search(*args, stop_event=self.stop_event)
+        except SearchAborted:
+            self.result = None
+
+    def is_idle(self):
+        return self.thread is None
+
+    def is_finished(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    # Returns the finished search's move and gets ready for the next one
+    def take_result(self):
+        self.thread = None
+        return self.result
+
+    def cancel(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+thinking_texts = {}  # Rendered "AI is thinking..." text by number of dots
+
+def thinking_overlays(thinker):
+    if thinker.is_idle():
+        return []
+    dots = int((time.time() - thinker.started_at) * 3) % 4
+    if dots not in thinking_texts:
+        text = THINKING_FONT.render("AI is thinking" + "." * dots, True, WHITE)
+        thinking_texts[dots] = (text, text.get_rect(topleft=(WIDTH // 2 - text.get_width() // 2, HEIGHT - 45)))
+    text, rect = thinking_texts[dots]
+    # Every dot count shares one rect so a shorter text fully covers the longer one
+    area = pygame.Rect(WIDTH // 2 - 150, HEIGHT - 45, 300, rect.height)
+    return [('thinking', dots, area, lambda: screen.blit(text, rect))]
+
+def draw_game(buttons, thinker=None):
+    overlays = [button_overlay(button) for button in buttons]
+    if thinker is not None:
+        overlays += thinking_overlays(thinker)
+    renderer.render(overlays + message_overlays())
+
+def human_ai_move(search_board, ai_table, ai_solver, stop_event=None, verbose=True):
+    # If AI can win now
+    winning_move = find_winning_move(search_board, AI)
+    if winning_move:
+        return winning_move
+    # If Human is about to win then Block it.
+    block_move = find_winning_move(search_board, PLAYER)
+    if block_move:
+        return block_move
+    # Play from the opening book, else look for a forced win, else search as deep as the time budget allows
+    result = iterative_deepening(search_board, AI, time_limit=AI_TIME_LIMIT, tt=ai_table,
+                                 threat_solver=ai_solver, stop_event=stop_event, book=opening_book)
+    if verbose and result.depth == 0 and result.nodes == 0:
+        print("AI played a book move")
+    elif verbose and (stop_event is None or not stop_event.is_set()):
+        print(f"AI searched to depth {result.depth} ({result.nodes} nodes)")
+    return result.row, result.col
+
+def minimax_move(search_board, table, stop_event=None):
+    table.new_search()
+    row, col, _ = minimax(search_board, DEPTH, AI_MINIMAX, tt=table, control=SearchControl(stop_event=stop_event))
+    return row, col
+
+def alphabeta_move(search_board, table, stop_event=None):
+    table.new_search()
+    row, col, _ = alphabeta(search_board, DEPTH, -math.inf, math.inf, AI_ALPHABETA, tt=table,
+                            control=SearchControl(stop_event=stop_event))
+    return row, col
 
 def human_vs_ai_game():
     running = True
     player_turn = True
     game_active = True
+    ai_table = TranspositionTable()  # Reused across the AI's moves in this game
+    ai_solver = ThreatSolver()
+    thinker = AIThinker()
+    # While the human thinks, search the AI's answers to their likeliest moves with the
+    # same time budget, so a predicted move is answered at once and a miss still finds
+    # the shared table warm
+    ponderer = Ponderer(lambda search_board, stop_event: human_ai_move(search_board, ai_table, ai_solver,
+                                                                      stop_event, verbose=False), ai_table)
+    pondering = AIThinker()
+    pondered_reply = None
 
     back_button = Button("Back to Menu", 10, 10, 150, 40, (100, 100, 100), (70, 70, 70))
+    undo_button = Button("Undo", WIDTH - 220, 10, 100, 40, (100, 100, 100), (70, 70, 70))
     pause_button = Button("Pause", WIDTH - 110, 10, 100, 40, (100, 100, 100), (70, 70, 70))
 
-    draw_board()
-    back_button.draw(screen)
-    pause_button.draw(screen)
-    pygame.display.update()
-
     while running:
         mouse_pos = pygame.mouse.get_pos()
         back_button.check_hover(mouse_pos)
+        undo_button.check_hover(mouse_pos)
         pause_button.check_hover(mouse_pos)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                thinker.cancel()
+                pondering.cancel()
                 pygame.quit()
                 sys.exit()
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if back_button.is_clicked(mouse_pos, event):
                     play_sound()
+                    thinker.cancel()
+                    pondering.cancel()
                     return True  # Go back to menu
 
                 if pause_button.is_clicked(mouse_pos, event):
                     play_sound()
+                    thinker.cancel()  # The AI starts its search (or pondering) again after the pause
+                    pondering.cancel()
                     if not show_pause_screen():
                         return True  # Go back to menu
+                    renderer.invalidate()
+                    continue
 
-                    # Redraw the game after pause
-                    draw_board()
-                    back_button.draw(screen)
-                    pause_button.draw(screen)
-                    pygame.display.update()
+                if undo_button.is_clicked(mouse_pos, event):
+                    play_sound()
+                    thinker.cancel()
+                    pondering.cancel()
+                    ponderer.replies.clear()
+                    pondered_reply = None
+                    # Take back the AI's answer as well, so it is the human's turn again
+                    plies = len(board.history) - (2 if board.last_player() == AI else 1)
+                    Replay(GameRecord.from_board(board), board).seek(plies)
+                    hide_message()
+                    player_turn = True
+                    game_active = True
                     continue
 
             if game_active and player_turn and event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
-                # Check if click is on the board (not on buttons)
-                if y > 60:  # Below the button area
+                # Every cell is playable except where a button covers it (rows 0-1 sit under
+                # the buttons on large boards)
+                on_button = any(button.button.collidepoint(x, y) for button in (back_button, undo_button, pause_button))
+                if not on_button:
                     row = y // SQUARE_SIZE
                     col = x // SQUARE_SIZE
-                    if is_valid_move(row, col):
-                        board[row][col] = PLAYER
-                        draw_board()
-                        back_button.draw(screen)
-                        pause_button.draw(screen)
-                        pygame.display.update()
-                        if check_win(PLAYER):
+                    if board.is_valid_move(row, col) and board.is_forbidden(row, col, PLAYER):
+                        display_message("Forbidden move")
+                    elif board.is_valid_move(row, col):
+                        pondering.cancel()
+                        pondered_reply = ponderer.take((row, col))
+                        board.place(row, col, PLAYER)
+                        if check_win(board, PLAYER):
                             win_sound.play()
                             display_message("YOU WON!")
                             game_active = False
+                            save_game()
+                        elif board.is_full():
+                            display_message("It's a draw!")
+                            game_active = False
+                            save_game()
                         player_turn = False
 
+        if game_active and player_turn and board.history and pondering.is_idle():
+            pondering.start(ponderer.ponder, board.copy(), PLAYER)
+
         if game_active and not player_turn:
-            start_time = time.time()
-
-            # If AI can win now
-            winning_move = find_winning_move(AI)
-            if winning_move:
-                row, col = winning_move
-            else:
-                # If Human is about to win then Block it.
-                block_move = find_winning_move(PLAYER)
-                if block_move:
-                    row, col = block_move
-                else:
-                    # Take Minimax decision if no winning state
-                    row, col, _ = minimax(DEPTH, True)
-            end_time = time.time()
-            print(f"AI moved at ({row}, {col}) in {end_time - start_time:.2f} seconds")
-
-            # Execute the AI move
-            board[row][col] = AI
-            draw_board()
-            back_button.draw(screen)
-            pause_button.draw(screen)
-            pygame.display.update()
-
-            if check_win(AI):
-                lose_sound.play()
-                display_message("YOU LOST!")
-                game_active = False
-            player_turn = True
-
-        # Redraw buttons to update hover state
-        draw_board()
-        back_button.draw(screen)
-        pause_button.draw(screen)
-        pygame.display.update()
+            move = None
+            if pondered_reply is not None:
+                move, pondered_reply = pondered_reply, None
+                print(f"AI moved at {move} from pondering ({ponderer.hits} hits, {ponderer.misses} misses)")
+            elif thinker.is_idle():
+                # Search a copy so drawing never sees the search's temporary stones
+                thinker.start(human_ai_move, board.copy(), ai_table, ai_solver)
+            elif thinker.is_finished():
+                start_time = thinker.started_at
+                move = thinker.take_result()
+                print(f"AI moved at {move} in {time.time() - start_time:.2f} seconds")
+
+            if move is not None:
+                # Execute the AI move
+                row, col = move
+                board.place(row, col, AI)
+                if check_win(board, AI):
+                    lose_sound.play()
+                    display_message("YOU LOST!")
+                    game_active = False
+                    save_game()
+                elif board.is_full():
+                    display_message("It's a draw!")
+                    game_active = False
+                    save_game()
+                player_turn = True
+
+        draw_game([back_button, undo_button, pause_button], thinker)
+        clock.tick(FPS)
 
     return False  # Game ended normally
 
 def ai_vs_ai_game():
     print("Starting AI vs AI (Minimax vs Alpha-Beta)...")
-    draw_board()
 
     back_button = Button("Back to Menu", 10, 10, 150, 40, (100, 100, 100), (70, 70, 70))
     pause_button = Button("Pause", WIDTH - 110, 10, 100, 40, (100, 100, 100), (70, 70, 70))
 
-    back_button.draw(screen)
-    pause_button.draw(screen)
-    pygame.display.update()
-
+    minimax_table = TranspositionTable()
+    alphabeta_table = TranspositionTable()
+    thinker = AIThinker()
     turn = AI_MINIMAX
     move_count = 0
     game_over = False
     game_active = True
+    next_move_at = 0  # Short pause between AI moves so they can be followed
 
     while not game_over:
         mouse_pos = pygame.mouse.get_pos()
@@ -462,68 +538,64 @@ def ai_vs_ai_game():
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                thinker.cancel()
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if back_button.is_clicked(mouse_pos, event):
                     play_sound()
+                    thinker.cancel()
                     return True
                 if pause_button.is_clicked(mouse_pos, event):
                     play_sound()
+                    thinker.cancel()
                     if not show_pause_screen():
                         return True
-
-                    draw_board()
-                    back_button.draw(screen)
-                    pause_button.draw(screen)
-                    pygame.display.update()
+                    renderer.invalidate()
 
         if game_active and not game_over:
-            start = time.time()
-            if turn == AI_MINIMAX:
-                row, col, _ = minimax(DEPTH, True)
-                print(f"AI (Minimax) plays: ({row}, {col})")
-                player_marker = AI_MINIMAX
-            else:
-                row, col, _ = alphabeta(DEPTH, -math.inf, math.inf, True)
-                print(f"AI (Alpha-Beta) plays: ({row}, {col})")
-                player_marker = AI_ALPHABETA
-
-            if row is not None and col is not None:
-                board[row][col] = player_marker
-                draw_board()
-                back_button.draw(screen)
-                pause_button.draw(screen)
-                pygame.display.update()
-                move_count += 1
-                print(f"Move {move_count} completed in {time.time() - start:.2f}s")
-
-                if check_win(player_marker):
-                    win_sound.play()
-                    winner = "Minimax AI" if turn == AI_MINIMAX else "Alpha-Beta AI"
-                    print(f"{winner} WINS!")
-                    display_message(f"{winner} WINS!", y_pos=100)
-                    game_over = True
-                elif all(cell != EMPTY for row in board for cell in row):
-                    print("It's a draw!")
-                    display_message("It's a draw!", y_pos=100)
-                    game_over = True
-
-                turn = AI_ALPHABETA if turn == AI_MINIMAX else AI_MINIMAX
-                pygame.time.delay(500)  # Delay between AI moves
-
-        draw_board()
-        back_button.draw(screen)
-        pause_button.draw(screen)
-        pygame.display.update()
+            if thinker.is_idle() and time.time() >= next_move_at:
+                if turn == AI_MINIMAX:
+                    thinker.start(minimax_move, board.copy(), minimax_table)
+                else:
+                    thinker.start(alphabeta_move, board.copy(), alphabeta_table)
+            elif thinker.is_finished():
+                start = thinker.started_at
+                row, col = thinker.take_result()
+                player_marker = turn
+                print(f"AI ({'Minimax' if turn == AI_MINIMAX else 'Alpha-Beta'}) plays: ({row}, {col})")
+
+                if row is not None and col is not None:
+                    board.place(row, col, player_marker)
+                    move_count += 1
+                    print(f"Move {move_count} completed in {time.time() - start:.2f}s")
+
+                    if check_win(board, player_marker):
+                        win_sound.play()
+                        winner = "Minimax AI" if turn == AI_MINIMAX else "Alpha-Beta AI"
+                        print(f"{winner} WINS!")
+                        display_message(f"{winner} WINS!", y_pos=100)
+                        game_over = True
+                    elif board.is_full():
+                        print("It's a draw!")
+                        display_message("It's a draw!", y_pos=100)
+                        game_over = True
+                    if game_over:
+                        save_game()
+
+                    turn = AI_ALPHABETA if turn == AI_MINIMAX else AI_MINIMAX
+                    next_move_at = time.time() + AI_MOVE_DELAY
+
+        draw_game([back_button, pause_button], thinker)
+        clock.tick(FPS)
 
     if game_over:
         waiting_for_menu = True
         while waiting_for_menu:
             mouse_pos = pygame.mouse.get_pos()
             back_button.check_hover(mouse_pos)
-            back_button.draw(screen)
-            pygame.display.update()
+            draw_game([back_button])
+            clock.tick(FPS)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -537,6 +609,13 @@ def ai_vs_ai_game():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Gomoku against Minimax / Alpha-Beta AIs")
+    parser.add_argument('--size', type=int, default=ROWS, help="Board size (default 15)")
+    parser.add_argument('--win-length', type=int, default=WIN_LENGTH, help="Stones in a row to win (default 5)")
+    parser.add_argument('--rule', choices=RULES, default=FREESTYLE,
+                        help="freestyle, exact (overlines do not win) or renju (restrictions on the first player)")
+    args = parser.parse_args()
+    configure(args.size, args.win_length, args.rule)
     while True:
         game_mode = display_menu()
         reset_game()
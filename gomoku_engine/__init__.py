@@ -0,0 +1,77 @@
+import importlib
+
+# Headless Gomoku engine: importing this package never touches pygame
+from .board import (
+    AI,
+    AI_ALPHABETA,
+    AI_MINIMAX,
+    COLS,
+    EMPTY,
+    EXACT_FIVE,
+    FREESTYLE,
+    PLAYER,
+    RENJU,
+    ROWS,
+    RULES,
+    Board,
+    check_win,
+    get_valid_moves,
+    opponent_of,
+)
+from .engines import Engine
+from .evaluation import evaluate_board, score_lines, score_lines_scan
+from .lines import LINE_WEIGHTS, WIN_LENGTH
+from .ordering import MoveOrderer, move_gain
+from .ponder import PONDER_REPLIES, Ponderer
+from .positions import (
+    POSITIONS,
+    board_from_stones,
+    board_stones,
+    build_board,
+    position_boards,
+    side_to_move,
+)
+from .search import (
+    MAX_DEPTH,
+    WIN_SCORE,
+    SearchAborted,
+    SearchControl,
+    SearchResult,
+    alphabeta,
+    find_winning_move,
+    iterative_deepening,
+    minimax,
+    principal_variation,
+    pvs,
+)
+from .transposition import EXACT, LOWER, UPPER, TranspositionTable
+from .stats import SearchStats, log_stats
+from .threats import ThreatSolver, threat_cells, win_points
+
+# Names from the modules that need multiprocessing, argparse or file formats (opening books,
+# game records, pattern training, parallel search) are imported on first use, so importing
+# the package stays cheap and `python -m gomoku_engine.records` and friends run cleanly
+_LAZY_MODULES = {
+    'book': ('OpeningBook', 'build_book', 'canonical_key', 'get_symmetries', 'load_book', 'write_book'),
+    'parallel': ('ParallelSearcher', 'speedup_curve'),
+    'patterns': ('DEFAULT_WEIGHTS', 'PatternState', 'PatternTable', 'default_pattern_table', 'load_pattern_table',
+                 'pattern_names', 'self_play', 'train'),
+    'records': ('GameRecord', 'RecordWriter', 'Replay', 'analyze_records', 'board_result', 'move_to_text',
+                'read_records', 'text_to_move'),
+}
+_LAZY_NAMES = {name: module for module, names in _LAZY_MODULES.items() for name in names}
+# Lists the lazy names too, so `from gomoku_engine import *` still brings them in
+__all__ = sorted(name for name in set(globals()) | set(_LAZY_NAMES)
+                 if not name.startswith('_') and name != 'importlib')
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_LAZY_NAMES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
@@ -0,0 +1,223 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from .board import COLS, FREESTYLE, ROWS, RULES, check_win, get_valid_moves
+from .evaluation import score_lines, score_lines_scan
+from .lines import WIN_LENGTH
+from .ordering import MoveOrderer
+from .positions import POSITIONS, build_board, side_to_move
+from .search import SearchControl, alphabeta, iterative_deepening, minimax
+
+DEFAULT_THRESHOLD = 0.15  # Allowed throughput drop before a comparison fails
+MIN_TIMING = 0.02  # Seconds each micro-benchmark timing must cover
+REPEATS = 3
+MINIMAX_DEPTH = 2
+ALPHABETA_DEPTH = 3
+SCALING_SIZES = (15, 19, 25, 31)
+
+# Per-size metrics of the board scaling benchmark
+SCALING_METRICS = ('place_undo_per_sec', 'last_move_wins_per_sec', 'check_win_per_sec', 'get_valid_moves_per_sec',
+                   'alphabeta_nps')
+
+# Metrics where higher is better and a drop counts as a regression
+THROUGHPUT_METRICS = ('check_win_per_sec', 'score_lines_per_sec', 'score_lines_scan_per_sec',
+                      'get_valid_moves_per_sec', 'minimax_nps', 'alphabeta_nps')
+
+
+def _time_calls(function, args, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function(*args)
+    return time.perf_counter() - start
+
+
+# Best-of-REPEATS calls per second of function(*args), with enough calls to cover MIN_TIMING
+def _calls_per_second(function, args):
+    calls = 1
+    while _time_calls(function, args, calls) < MIN_TIMING:
+        calls *= 2
+    best = min(_time_calls(function, args, calls) for _ in range(REPEATS))
+    return calls / best if best else math.inf
+
+
+# Best-of-REPEATS nodes per second of one search; also returns its (row, col, score)
+def _search_rate(search, seed):
+    best_rate = 0.0
+    result = None
+    for _ in range(REPEATS):
+        random.seed(seed)
+        control = SearchControl()
+        start = time.perf_counter()
+        result = search(control)
+        elapsed = time.perf_counter() - start
+        best_rate = max(best_rate, control.nodes / elapsed if elapsed else math.inf)
+    return best_rate, result
+
+
+def benchmark_position(position, seed=0, minimax_depth=MINIMAX_DEPTH, alphabeta_depth=ALPHABETA_DEPTH):
+    board = build_board(position['moves'])
+    player = side_to_move(board)
+    metrics = {
+        'check_win_per_sec': _calls_per_second(check_win, (board, player)),
+        'score_lines_per_sec': _calls_per_second(score_lines, (board, player)),
+        'score_lines_scan_per_sec': _calls_per_second(score_lines_scan, (board, player)),
+        'get_valid_moves_per_sec': _calls_per_second(get_valid_moves, (board,)),
+    }
+
+    metrics['minimax_nps'], (mm_row, mm_col, mm_score) = _search_rate(
+        lambda control: minimax(board, minimax_depth, player, control=control), seed)
+    metrics['alphabeta_nps'], (ab_row, ab_col, ab_score) = _search_rate(
+        lambda control: alphabeta(board, minimax_depth, -math.inf, math.inf, player, control=control,
+                                  orderer=MoveOrderer()), seed)
+
+    random.seed(seed)
+    deep = iterative_deepening(board, player, max_depth=alphabeta_depth, collect_stats=True)
+    metrics['time_to_depth'] = [[depth, round(seconds, 6)] for depth, _, seconds in deep.stats.iterations]
+    metrics['best_move'] = [deep.row, deep.col]
+    # alphabeta must reproduce minimax's value at the same depth
+    metrics['minimax_alphabeta_agree'] = mm_score == ab_score
+    if position['expected'] is not None:
+        metrics['expected_move_found'] = (deep.row, deep.col) in position['expected']
+    return metrics
+
+
+def _geometric_mean(values):
+    return math.exp(sum(math.log(value) for value in values) / len(values))
+
+
+def _place_undo(board, row, col, player):
+    board.place(row, col, player)
+    board.undo()
+
+
+# Throughput on the midgame positions moved to the centre of boards of each size. Every
+# incremental structure only touches the cells around a move, so these should stay flat
+# as the board grows (check_win works on whole bitboards and grows slowly).
+def run_scaling(sizes=SCALING_SIZES, seed=0, depth=ALPHABETA_DEPTH, win_length=WIN_LENGTH, rule=FREESTYLE):
+    results = []
+    for size in sizes:
+        offset = (size - ROWS) // 2
+        metrics = {metric: [] for metric in SCALING_METRICS}
+        for position in POSITIONS:
+            if position['category'] != 'midgame':
+                continue
+            moves = [(row + offset, col + offset) for row, col in position['moves']]
+            board = build_board(moves, size, size, win_length, rule)
+            player = side_to_move(board)
+            row, col = get_valid_moves(board, player)[0]
+            metrics['place_undo_per_sec'].append(_calls_per_second(_place_undo, (board, row, col, player)))
+            metrics['last_move_wins_per_sec'].append(_calls_per_second(board.last_move_wins, ()))
+            metrics['check_win_per_sec'].append(_calls_per_second(check_win, (board, player)))
+            metrics['get_valid_moves_per_sec'].append(_calls_per_second(get_valid_moves, (board,)))
+            metrics['alphabeta_nps'].append(_search_rate(
+                lambda control: alphabeta(board, depth, -math.inf, math.inf, player, control=control,
+                                          orderer=MoveOrderer()), seed)[0])
+        results.append({'size': size, **{metric: _geometric_mean(values) for metric, values in metrics.items()}})
+    return results
+
+
+def run_benchmark(seed=0, positions=POSITIONS, minimax_depth=MINIMAX_DEPTH, alphabeta_depth=ALPHABETA_DEPTH):
+    results = {}
+    for position in positions:
+        results[position['name']] = benchmark_position(position, seed, minimax_depth, alphabeta_depth)
+
+    summary = {}
+    for metric in THROUGHPUT_METRICS:
+        values = [result[metric] for result in results.values()]
+        summary[metric] = _geometric_mean(values)
+    agreements = [result['minimax_alphabeta_agree'] for result in results.values()]
+    summary['minimax_alphabeta_agreement'] = sum(agreements) / len(agreements)
+    found = [result['expected_move_found'] for result in results.values() if 'expected_move_found' in result]
+    summary['expected_move_rate'] = sum(found) / len(found) if found else 1.0
+    return {
+        'seed': seed,
+        'minimax_depth': minimax_depth,
+        'alphabeta_depth': alphabeta_depth,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'summary': summary,
+        'positions': results,
+    }
+
+
+# Lists the throughput metrics that fell more than `threshold` below the baseline, plus any
+# drop in move agreement. Summary metrics are geometric means over all positions and always
+# checked; single positions are noisier and only checked with per_position=True.
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD, per_position=False):
+    regressions = []
+
+    def check(label, current, previous):
+        if previous and current < previous * (1 - threshold):
+            regressions.append(f"{label}: {current:.0f} vs baseline {previous:.0f} "
+                               f"({(current / previous - 1) * 100:+.1f}%)")
+
+    for metric in THROUGHPUT_METRICS:
+        check(f"summary.{metric}", report['summary'][metric], baseline['summary'].get(metric))
+        if not per_position:
+            continue
+        for name, result in report['positions'].items():
+            previous = baseline['positions'].get(name, {}).get(metric)
+            check(f"{name}.{metric}", result[metric], previous)
+    for metric in ('minimax_alphabeta_agreement', 'expected_move_rate'):
+        if report['summary'][metric] < baseline['summary'].get(metric, 0):
+            regressions.append(f"summary.{metric}: {report['summary'][metric]:.2f} "
+                               f"vs baseline {baseline['summary'][metric]:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gomoku engine benchmark on fixed positions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--minimax-depth', type=int, default=MINIMAX_DEPTH)
+    parser.add_argument('--alphabeta-depth', type=int, default=ALPHABETA_DEPTH)
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative throughput drop (default 0.15)")
+    parser.add_argument('--per-position', action='store_true', help="Also fail on single-position drops")
+    parser.add_argument('--scaling', type=int, nargs='*', metavar='SIZE',
+                        help=f"Measure throughput on larger boards instead (default sizes {SCALING_SIZES})")
+    parser.add_argument('--win-length', type=int, default=WIN_LENGTH, help="Win length for --scaling")
+    parser.add_argument('--rule', choices=RULES, default=FREESTYLE, help="Rule variant for --scaling")
+    args = parser.parse_args(argv)
+
+    if args.scaling is not None:
+        sizes = args.scaling or SCALING_SIZES
+        if min(sizes) < max(ROWS, COLS):
+            parser.error(f"--scaling sizes must be at least {max(ROWS, COLS)}")
+        results = run_scaling(sizes, args.seed, args.alphabeta_depth, args.win_length, args.rule)
+        print(f"{'size':>5} " + ' '.join(f"{metric:>24}" for metric in SCALING_METRICS))
+        for result in results:
+            print(f"{result['size']:5d} " + ' '.join(f"{result[metric]:24.0f}" for metric in SCALING_METRICS))
+        if args.save:
+            with open(args.save, 'w') as file:
+                json.dump(results, file, indent=2)
+        return results
+
+    report = run_benchmark(args.seed, minimax_depth=args.minimax_depth, alphabeta_depth=args.alphabeta_depth)
+    for name, result in report['positions'].items():
+        print(f"{name:16} minimax {result['minimax_nps']:9.0f} n/s  alphabeta {result['alphabeta_nps']:9.0f} n/s  "
+              f"time-to-depth {result['time_to_depth'][-1][1]:.3f}s  move {tuple(result['best_move'])}")
+    for metric, value in report['summary'].items():
+        print(f"{metric:28} {value:.2f}")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(report, baseline, args.threshold, args.per_position)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
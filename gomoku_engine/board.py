@@ -0,0 +1,336 @@
+from .lines import WIN_LENGTH, get_cell_moves, get_geometry, get_neighbors, get_score_gain, state_step, window_score
+from .transposition import get_zobrist_keys
+
+# Board constants shared by the engine and the GUI
+ROWS, COLS = 15, 15
+EMPTY = 0
+PLAYER = 1  # Human (in Human vs AI mode)
+AI = 2  # AI (in Human vs AI mode)
+AI_MINIMAX = 1  # AI using Minimax (in AI vs AI mode)
+AI_ALPHABETA = 2  # AI using ALPHABETA (in AI vs AI mode)
+
+# Rule variants: freestyle (win_length or more in a row wins), exact (exactly win_length,
+# overlines do not count) and renju-style (PLAYER, who moves first, wins with exactly
+# win_length and may not play overlines, double fours or double threes)
+FREESTYLE = 'freestyle'
+EXACT_FIVE = 'exact'
+RENJU = 'renju'
+RULES = (FREESTYLE, EXACT_FIVE, RENJU)
+
+
+def opponent_of(player):
+    return AI if player == PLAYER else PLAYER
+
+
+# Class holding the stones of one game, without any pygame dependency.
+# Each player's stones are also kept as a Python int bitboard where cell (row, col)
+# is bit row * stride + col; the stride has one spare column so shifts never wrap.
+# Per-window stone counts are updated on every move so both players' line scores
+# are always available without rescanning the board, and so is the Zobrist hash
+# and the set of empty cells next to a stone (the move candidates). All of these only
+# touch the cells and windows around the move, so their cost does not grow with the board.
+# make/unmake work on bit indices and allocate nothing: every table is built with the board
+# (or shared between boards of one shape) and the moves in history are shared (row, col) tuples.
+class Board:
+    __slots__ = ('rows', 'cols', 'win_length', 'rule', 'exact', 'state_step', 'score_gain', 'stride',
+                 'directions', 'run_shifts', 'valid_mask', 'windows', 'cell_windows', 'zobrist', 'side_key',
+                 'neighbors', 'cell_moves', 'grid', 'bits', 'history', 'window_state', 'scores', 'hash',
+                 'near', 'candidates', 'patterns')
+
+    def __init__(self, rows=ROWS, cols=COLS, win_length=WIN_LENGTH, rule=FREESTYLE):
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule '{rule}', expected one of {', '.join(RULES)}")
+        if win_length > min(rows, cols):
+            raise ValueError(f"A {rows}x{cols} board cannot fit {win_length} in a row")
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.rule = rule
+        # Players who only win with exactly win_length in a row, indexed by PLAYER / AI
+        self.exact = [False, rule != FREESTYLE, rule == EXACT_FIVE]
+        self.state_step = state_step(win_length)
+        self.score_gain = get_score_gain(win_length)
+        self.stride = cols + 1
+        # Horizontal, vertical, diagonal, anti-diagonal bit shifts
+        self.directions = (1, self.stride, self.stride + 1, self.stride - 1)
+        # Shifts used by check_win to find runs of win_length, doubling the run each time
+        lengths = []
+        length = 1
+        while length * 2 <= win_length:
+            lengths.append(length)
+            length *= 2
+        if length < win_length:
+            lengths.append(win_length - length)
+        self.run_shifts = tuple(tuple(length * step for length in lengths) for step in self.directions)
+        self.valid_mask = 0
+        for row in range(rows):
+            self.valid_mask |= ((1 << cols) - 1) << (row * self.stride)
+        self.windows, self.cell_windows = get_geometry(rows, cols, win_length)
+        self.zobrist, self.side_key = get_zobrist_keys(rows, cols)
+        self.neighbors = get_neighbors(rows, cols)
+        self.cell_moves = get_cell_moves(rows, cols)  # (row, col) of each bit index
+        self.patterns = None  # PatternState kept up to date when a PatternTable is in use
+        self.reset()
+
+    # Allows the old board[row][col] reads to keep working
+    def __getitem__(self, row):
+        return self.grid[row]
+
+    def is_valid_move(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.grid[row][col] == EMPTY
+
+    def place(self, row, col, player):
+        self.make(row * self.stride + col, player)
+
+    def make(self, index, player):
+        move = self.cell_moves[index]
+        self.grid[move[0]][move[1]] = player
+        self.bits[player] |= 1 << index
+        self.hash ^= self.zobrist[player][index]
+        self.history.append(move)
+
+        state = self.window_state
+        step = self.state_step[player]
+        if self.patterns is None:
+            _, player_gain, ai_gain = self.score_gain[player]
+            player_delta = ai_delta = 0
+            for window in self.cell_windows[index]:
+                before = state[window]
+                player_delta += player_gain[before]
+                ai_delta += ai_gain[before]
+                state[window] = before + step
+            self.scores[PLAYER] += player_delta
+            self.scores[AI] += ai_delta
+        else:
+            # The pattern table replaces the line scores, so only the window counts are kept
+            for window in self.cell_windows[index]:
+                state[window] += step
+            self.patterns.place(index, player)
+
+        near = self.near
+        candidates = self.candidates
+        occupied = self.bits[PLAYER] | self.bits[AI]
+        candidates.discard(index)
+        for cell in self.neighbors[index]:
+            near[cell] += 1
+            if near[cell] == 1 and not occupied >> cell & 1:
+                candidates.add(cell)
+
+    def undo(self):
+        return self.cell_moves[self.unmake()]
+
+    # Takes back the last move and returns its bit index
+    def unmake(self):
+        row, col = self.history.pop()
+        index = row * self.stride + col
+        player = self.grid[row][col]
+        self.bits[player] ^= 1 << index
+        self.hash ^= self.zobrist[player][index]
+        self.grid[row][col] = EMPTY
+
+        state = self.window_state
+        step = self.state_step[player]
+        if self.patterns is None:
+            _, player_gain, ai_gain = self.score_gain[player]
+            player_delta = ai_delta = 0
+            for window in self.cell_windows[index]:
+                before = state[window] - step
+                player_delta += player_gain[before]
+                ai_delta += ai_gain[before]
+                state[window] = before
+            self.scores[PLAYER] -= player_delta
+            self.scores[AI] -= ai_delta
+        else:
+            for window in self.cell_windows[index]:
+                state[window] -= step
+            self.patterns.undo(index, player)
+
+        near = self.near
+        candidates = self.candidates
+        for cell in self.neighbors[index]:
+            near[cell] -= 1
+            if near[cell] == 0:
+                candidates.discard(cell)
+        if near[index]:
+            candidates.add(index)
+        return index
+
+    def last_move(self):
+        return self.history[-1] if self.history else None
+
+    def last_player(self):
+        if not self.history:
+            return EMPTY
+        row, col = self.history[-1]
+        return self.grid[row][col]
+
+    # Hash of the position with `to_move` about to play
+    def key(self, to_move):
+        return self.hash ^ self.side_key if to_move == AI else self.hash
+
+    def is_full(self):
+        return len(self.history) == self.rows * self.cols
+
+    def occupied(self):
+        return self.bits[PLAYER] | self.bits[AI]
+
+    # Only looks at the four lines through (row, col); on an empty cell, tells whether
+    # playing there would win
+    def is_win_at(self, row, col, player):
+        bits = self.bits[player]
+        index = row * self.stride + col
+        win_length = self.win_length
+        exact = self.exact[player]
+        for step in self.directions:
+            count = 1
+            i = index - step
+            while i >= 0 and bits >> i & 1:
+                count += 1
+                i -= step
+            i = index + step
+            while bits >> i & 1:
+                count += 1
+                i += step
+            if count == win_length or (count > win_length and not exact):
+                return True
+        return False
+
+    # Renju-style restrictions on PLAYER: an overline, or a move making two fours (in two
+    # directions or within one line) or open threes in two directions, is forbidden unless
+    # it wins outright
+    def is_forbidden(self, row, col, player):
+        if self.rule != RENJU or player != PLAYER:
+            return False
+        # Needs stones in at least two windows through the cell to make two threats
+        target = max(1, self.win_length - 3)
+        step = self.state_step[PLAYER]
+        state = self.window_state
+        crowded = 0
+        for window in self.cell_windows[row * self.stride + col]:
+            if state[window] % step == 0 and state[window] // step >= target:
+                crowded += 1
+        if crowded < 2 or self.is_win_at(row, col, PLAYER):
+            return False
+
+        fours = threes = 0
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            line = self._line(row, col, d_row, d_col)
+            center = self.win_length
+            start, end = _run_bounds(line, center)
+            if end - start + 1 > self.win_length:
+                return True
+            points = _five_points(line, center, self.win_length)
+            if points:
+                # Both ends of one open four are win_length apart; any other pair of five
+                # points (x_xxx_x) is two fours in the same line
+                fours += len(points) - sum(1 for first, second in zip(points, points[1:])
+                                           if second - first == self.win_length)
+            elif any(len(_five_points(line[:point] + [PLAYER] + line[point + 1:], center, self.win_length)) >= 2
+                     for point, value in enumerate(line) if value == EMPTY):
+                threes += 1
+        return fours >= 2 or threes >= 2
+
+    # Cells within win_length of (row, col) along one direction, with (row, col) taken by
+    # PLAYER; the opponent's stones and off-board cells read as AI
+    def _line(self, row, col, d_row, d_col):
+        line = []
+        for offset in range(-self.win_length, self.win_length + 1):
+            r, c = row + d_row * offset, col + d_col * offset
+            if offset == 0:
+                line.append(PLAYER)
+            elif 0 <= r < self.rows and 0 <= c < self.cols:
+                line.append(self.grid[r][c])
+            else:
+                line.append(AI)
+        return line
+
+    # True if the stone played last completed five in a row
+    def last_move_wins(self):
+        if not self.history:
+            return False
+        row, col = self.history[-1]
+        return self.is_win_at(row, col, self.grid[row][col])
+
+    # Evaluates with a patterns.PatternTable from now on (None goes back to line scores).
+    # Line scores are not kept while a table is in use and are rebuilt when it is dropped.
+    def use_patterns(self, table):
+        had_patterns = self.patterns is not None
+        self.patterns = None if table is None else table.new_state(self)
+        if had_patterns and table is None:
+            self.rescore()
+
+    # Rebuilds both line scores from the window counts
+    def rescore(self):
+        counts = {}
+        for state in self.window_state:
+            counts[state] = counts.get(state, 0) + 1
+        for player in (PLAYER, AI):
+            self.scores[player] = sum(window_score(state, player, self.win_length) * count
+                                      for state, count in counts.items())
+
+    def copy(self):
+        new_board = Board(self.rows, self.cols, self.win_length, self.rule)
+        if self.patterns is not None:
+            new_board.use_patterns(self.patterns.table)
+        for row, col in self.history:
+            new_board.place(row, col, self.grid[row][col])
+        return new_board
+
+    def reset(self):
+        self.grid = [[EMPTY for _ in range(self.cols)] for _ in range(self.rows)]
+        self.bits = [0, 0, 0]  # Indexed by PLAYER / AI
+        self.history = []
+        self.window_state = [0] * len(self.windows)
+        self.scores = [0, 0, 0]  # Line score per player, indexed by PLAYER / AI
+        self.hash = 0
+        self.near = [0] * (self.rows * self.stride)  # Stones around each cell
+        self.candidates = set()  # Empty cells with at least one stone around them
+        if self.patterns is not None:
+            self.patterns.clear()
+
+
+# First and last index of PLAYER's run through line[center]
+def _run_bounds(line, center):
+    start = end = center
+    while start > 0 and line[start - 1] == PLAYER:
+        start -= 1
+    while end < len(line) - 1 and line[end + 1] == PLAYER:
+        end += 1
+    return start, end
+
+
+# Empty points of `line` where PLAYER would make exactly win_length in a row through `center`
+def _five_points(line, center, win_length):
+    points = []
+    for point, value in enumerate(line):
+        if value == EMPTY and abs(point - center) < win_length:
+            start, end = _run_bounds(line[:point] + [PLAYER] + line[point + 1:], center)
+            if start <= point <= end and end - start + 1 == win_length:
+                points.append(point)
+    return points
+
+
+def check_win(board, player):
+    bits = board.bits[player]
+    exact = board.exact[player]
+    for step, shifts in zip(board.directions, board.run_shifts):
+        # Bits where a run of win_length stones starts
+        runs = bits
+        for shift in shifts:
+            runs &= runs >> shift
+        if exact:
+            runs &= ~(bits << step) & ~(bits >> (board.win_length * step))
+        if runs:
+            return True
+    return False
+
+
+# Candidate moves; with `player`, Renju-style forbidden moves are left out
+def get_valid_moves(board, player=None):
+    if not board.history:
+        return [(board.rows // 2, board.cols // 2)]
+    cell_moves = board.cell_moves
+    moves = [cell_moves[index] for index in sorted(board.candidates)]
+    if player is not None and board.rule == RENJU and player == PLAYER:
+        moves = [move for move in moves if not board.is_forbidden(*move, player)] or moves
+    return moves
@@ -0,0 +1,252 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+from .board import AI, COLS, FREESTYLE, PLAYER, ROWS, RULES, Board, opponent_of
+from .lines import WIN_LENGTH
+from .ordering import MoveOrderer
+from .search import WIN_SCORE, iterative_deepening
+from .transposition import NO_MOVE, TranspositionTable
+
+# Book file layout: a header, then an open-addressing hash table of fixed-size records
+# (canonical position key, reply as row * cols + col in the canonical frame, search score).
+# Lookups hash straight into the memory-mapped file, so the book is never read into memory.
+# A book only answers games with the board size, win length and rule it was built for.
+MAGIC = b'GMKB'
+VERSION = 2
+HEADER = struct.Struct('<4sHBBBBI')  # magic, version, rows, cols, win length, rule (index in RULES), slot count
+RECORD = struct.Struct('<QHi')
+EMPTY_SLOT = 0xFFFF  # Reply value marking an unused record
+
+
+# The 8 symmetries of a square board (4 rotations, each optionally mirrored) as functions
+# of (row, col); a rectangular board only keeps the 4 that preserve its shape
+def _transforms(rows, cols):
+    last_row, last_col = rows - 1, cols - 1
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (last_row - r, last_col - c),
+        lambda r, c: (r, last_col - c),
+        lambda r, c: (last_row - r, c),
+    ]
+    if rows == cols:
+        transforms += [
+            lambda r, c: (c, last_row - r),
+            lambda r, c: (last_col - c, r),
+            lambda r, c: (c, r),
+            lambda r, c: (last_col - c, last_row - r),
+        ]
+    return transforms
+
+
+# For each symmetry, a list mapping a cell index (row * cols + col) to its image
+def get_symmetries(rows, cols):
+    symmetries = []
+    for transform in _transforms(rows, cols):
+        mapping = []
+        for row in range(rows):
+            for col in range(cols):
+                new_row, new_col = transform(row, col)
+                mapping.append(new_row * cols + new_col)
+        symmetries.append(mapping)
+    return symmetries
+
+
+# Smallest Zobrist key of the position (with `to_move` about to play) over all board
+# symmetries, and the symmetry that produced it
+def canonical_key(board, to_move, symmetries):
+    cols = board.cols
+    stride = board.stride
+    best_key = best_number = None
+    for number, mapping in enumerate(symmetries):
+        key = 0
+        for row, col in board.history:
+            image = mapping[row * cols + col]
+            key ^= board.zobrist[board.grid[row][col]][image // cols * stride + image % cols]
+        if to_move == AI:
+            key ^= board.side_key
+        if best_key is None or key < best_key:
+            best_key, best_number = key, number
+    return best_key, best_number
+
+
+# Writes {canonical key: (reply, score)} as a book file with a table at most half full
+def write_book(path, entries, rows=ROWS, cols=COLS, win_length=WIN_LENGTH, rule=FREESTYLE):
+    slots = 16
+    while slots < 2 * len(entries):
+        slots *= 2
+    data = bytearray(HEADER.size + slots * RECORD.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, rows, cols, win_length, RULES.index(rule), slots)
+    for slot in range(slots):
+        RECORD.pack_into(data, HEADER.size + slot * RECORD.size, 0, EMPTY_SLOT, 0)
+    for key, (reply, score) in entries.items():
+        slot = key & (slots - 1)
+        while RECORD.unpack_from(data, HEADER.size + slot * RECORD.size)[1] != EMPTY_SLOT:
+            slot = (slot + 1) & (slots - 1)
+        RECORD.pack_into(data, HEADER.size + slot * RECORD.size, key, reply, score)
+    with open(path, 'wb') as book_file:
+        book_file.write(data)
+
+
+# Read-only opening book memory-mapped from a file written by write_book.
+# lookup() returns the stored reply for the position, mapped back from the canonical
+# frame to the board's orientation, or None when the position is not in the book.
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} is empty, not an opening book")
+        magic, version = HEADER.unpack_from(self.data, 0)[:2]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book, rebuild it with "
+                             f"python -m gomoku_engine.book build")
+        _, _, self.rows, self.cols, self.win_length, rule, self.slots = HEADER.unpack_from(self.data, 0)
+        self.rule = RULES[rule]
+        self.symmetries = get_symmetries(self.rows, self.cols)
+        self.inverses = []
+        for mapping in self.symmetries:
+            inverse = [0] * len(mapping)
+            for index, image in enumerate(mapping):
+                inverse[image] = index
+            self.inverses.append(inverse)
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        slot = key & (self.slots - 1)
+        while True:
+            stored_key, reply, score = RECORD.unpack_from(self.data, HEADER.size + slot * RECORD.size)
+            if reply == EMPTY_SLOT:
+                return None
+            if stored_key == key:
+                return reply, score
+            slot = (slot + 1) & (self.slots - 1)
+
+    # Returns (row, col, score) for `player` to play, or None (also for another board size,
+    # win length or rule)
+    def lookup(self, board, player):
+        if (board.rows, board.cols, board.win_length, board.rule) != (self.rows, self.cols, self.win_length, self.rule):
+            return None
+        key, number = canonical_key(board, player, self.symmetries)
+        entry = self.probe(key)
+        if entry is not None:
+            row, col = divmod(self.inverses[number][entry[0]], self.cols)
+            if board.is_valid_move(row, col) and not board.is_forbidden(row, col, player):
+                self.hits += 1
+                return row, col, entry[1]
+        self.misses += 1
+        return None
+
+    def __len__(self):
+        return sum(RECORD.unpack_from(self.data, HEADER.size + slot * RECORD.size)[1] != EMPTY_SLOT
+                   for slot in range(self.slots))
+
+    def close(self):
+        if not self.data.closed:
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Loads the book at `path`, or returns None if there is no such file
+def load_book(path):
+    try:
+        return OpeningBook(path)
+    except FileNotFoundError:
+        return None
+
+
+# Builds book entries by deep search: every position reached within `plies` moves of the
+# empty board by following, at each ply, the searched best move and the next best
+# candidates in MoveOrderer order (`width` moves in all) gets its searched best reply.
+# Positions that are symmetric to one already in the book are searched only once.
+def build_book(plies=4, width=3, depth=4, time_limit=None, rows=ROWS, cols=COLS, seed=0, progress=None,
+               win_length=WIN_LENGTH, rule=FREESTYLE):
+    random.seed(seed)
+    board = Board(rows, cols, win_length, rule)
+    symmetries = get_symmetries(rows, cols)
+    tt = TranspositionTable()
+    orderer = MoveOrderer()
+    entries = {}
+
+    def expand(player, plies_left):
+        key, number = canonical_key(board, player, symmetries)
+        if key in entries:
+            return
+        result = iterative_deepening(board, player, max_depth=depth, time_limit=time_limit, tt=tt)
+        entries[key] = (symmetries[number][result.row * cols + result.col], int(result.score))
+        if progress is not None:
+            progress(len(entries), board.history, (result.row, result.col), result.score)
+        if plies_left <= 1 or abs(result.score) >= WIN_SCORE:
+            return
+        replies = [(result.row, result.col)]
+        for move in orderer.order(board, player, NO_MOVE):
+            if len(replies) >= width:
+                break
+            if move not in replies:
+                replies.append(move)
+        for row, col in replies:
+            board.place(row, col, player)
+            if not board.last_move_wins():
+                expand(opponent_of(player), plies_left - 1)
+            board.undo()
+
+    expand(PLAYER, plies)
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a Gomoku opening book")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="search opening positions and write a book")
+    build.add_argument('output')
+    build.add_argument('--plies', type=int, default=4, help="moves from the empty board to cover")
+    build.add_argument('--width', type=int, default=3, help="moves followed in each position")
+    build.add_argument('--depth', type=int, default=4)
+    build.add_argument('--time', type=float, default=None, help="seconds per position")
+    build.add_argument('--seed', type=int, default=0)
+    build.add_argument('--rows', type=int, default=ROWS)
+    build.add_argument('--cols', type=int, default=COLS)
+    build.add_argument('--win-length', type=int, default=WIN_LENGTH)
+    build.add_argument('--rule', choices=RULES, default=FREESTYLE)
+    probe = commands.add_parser('probe', help="print the book reply for a move sequence")
+    probe.add_argument('book')
+    probe.add_argument('moves', nargs='*', help="moves as row,col starting with PLAYER")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        def progress(count, history, move, score):
+            print(f"{count:5d} {history} -> {move} ({score})", file=sys.stderr)
+        entries = build_book(args.plies, args.width, args.depth, args.time, args.rows, args.cols,
+                             args.seed, progress, args.win_length, args.rule)
+        write_book(args.output, entries, args.rows, args.cols, args.win_length, args.rule)
+        print(f"Wrote {len(entries)} positions to {args.output}", file=sys.stderr)
+        return entries
+
+    with OpeningBook(args.book) as book:
+        board = Board(book.rows, book.cols, book.win_length, book.rule)
+        player = PLAYER
+        for move in args.moves:
+            row, col = map(int, move.split(','))
+            board.place(row, col, player)
+            player = opponent_of(player)
+        found = book.lookup(board, player)
+        print(f"{len(book)} positions; reply: {found[:2] if found else None}"
+              + (f" (score {found[2]})" if found else ""))
+        return found
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import math
+
+from .ordering import MoveOrderer
+from .search import MAX_DEPTH, alphabeta, iterative_deepening, minimax
+from .threats import ThreatSolver
+from .transposition import TranspositionTable
+
+ENGINE_KINDS = ('minimax', 'alphabeta', 'id', 'pvs')
+
+
+def _flag(value):
+    return value not in ('0', 'false', 'no')
+
+
+# Builds a player from a text spec such as "alphabeta:depth=3" or "id:time=0.2,beam=12,threats=1",
+# so engines can be named on the command line and sent to worker processes as plain strings.
+# Kinds: minimax, alphabeta, id (iterative deepening alphabeta) and pvs (iterative deepening
+# PVS with aspiration windows). Options: depth, time (seconds), nodes, order (MoveOrderer for
+# minimax/alphabeta), beam (top-K moves, implies order), threats (VCF/VCT first, id/pvs only),
+# tt_mb, book (opening book file consulted before searching), batch (NumPy leaf evaluation for
+# alphabeta/id, needs numpy), deterministic (alphabeta/id break ties by move order, not at random),
+# patterns (pattern table evaluation: 1 for the trained default weights or a weights JSON file;
+# boards with another win length than the weights were trained for use line scores).
+class Engine:
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, option_text = spec.partition(':')
+        if kind not in ENGINE_KINDS:
+            raise ValueError(f"Unknown engine '{kind}', expected one of {', '.join(ENGINE_KINDS)}")
+        self.kind = kind
+        options = {}
+        for item in filter(None, option_text.split(',')):
+            name, _, value = item.partition('=')
+            options[name] = value
+        self.depth = int(options.get('depth', 2))
+        self.time_limit = float(options['time']) if 'time' in options else None
+        self.max_nodes = int(options['nodes']) if 'nodes' in options else None
+        self.beam_width = int(options['beam']) if 'beam' in options else None
+        self.use_threats = _flag(options.get('threats', '0'))
+        self.ordered = _flag(options.get('order', '0')) or self.beam_width is not None
+        self.tt_bytes = int(float(options.get('tt_mb', 16)) * 1024 * 1024)
+        self.deterministic = _flag(options.get('deterministic', '0'))
+        self.book = None
+        if 'book' in options:
+            from .book import load_book
+            self.book = load_book(options['book'])
+        self.batch_evaluator = None
+        if _flag(options.get('batch', '0')):
+            from .vectorized import BatchEvaluator
+            self.batch_evaluator = BatchEvaluator
+        self.batch = None
+        self.pattern_table = None
+        patterns = options.get('patterns', '0')
+        if _flag(patterns):
+            if self.batch_evaluator is not None:
+                raise ValueError("patterns and batch cannot be combined")
+            from .patterns import default_pattern_table, load_pattern_table
+            self.pattern_table = default_pattern_table() if patterns in ('', '1', 'true', 'yes') else \
+                load_pattern_table(patterns)
+        self.new_game()
+
+    def new_game(self):
+        self.tt = TranspositionTable(self.tt_bytes)
+        self.threat_solver = ThreatSolver() if self.use_threats else None
+
+    # Returns the (row, col) this engine plays for `player` on `board`. time_limit (seconds)
+    # replaces the spec's time for this move; minimax and alphabeta search to their depth anyway.
+    # The board is switched to this engine's evaluation (pattern table or line scores) first.
+    def choose_move(self, board, player, time_limit=None):
+        found = self.book.lookup(board, player) if self.book is not None else None
+        if found is not None:
+            return found[:2]
+        table = self.pattern_table
+        if table is not None and table.win_length != board.win_length:
+            table = None
+        if (board.patterns.table if board.patterns is not None else None) is not table:
+            board.use_patterns(table)
+        orderer = MoveOrderer(self.beam_width) if self.ordered else None
+        if self.batch_evaluator is not None and (self.batch is None or (self.batch.rows, self.batch.cols,
+                                                 self.batch.win_length) != (board.rows, board.cols, board.win_length)):
+            self.batch = self.batch_evaluator(board.rows, board.cols, board.win_length)
+        if self.kind == 'minimax':
+            self.tt.new_search()
+            row, col, _ = minimax(board, self.depth, player, tt=self.tt, orderer=orderer)
+        elif self.kind == 'alphabeta':
+            self.tt.new_search()
+            row, col, _ = alphabeta(board, self.depth, -math.inf, math.inf, player, tt=self.tt, orderer=orderer,
+                                    batch=self.batch, deterministic=self.deterministic)
+        else:
+            if time_limit is None:
+                time_limit = self.time_limit
+            max_depth = self.depth if time_limit is None and self.max_nodes is None else MAX_DEPTH
+            result = iterative_deepening(board, player, max_depth=max_depth, time_limit=time_limit,
+                                         max_nodes=self.max_nodes, tt=self.tt, beam_width=self.beam_width,
+                                         threat_solver=self.threat_solver, batch=self.batch,
+                                         use_pvs=self.kind == 'pvs', deterministic=self.deterministic)
+            row, col = result.row, result.col
+        return row, col
+
+    def __repr__(self):
+        return f"Engine({self.spec!r})"
@@ -0,0 +1,45 @@
+from .board import EMPTY, opponent_of
+from .lines import line_weights
+
+
+# Line scores of `player` minus the opponent's, or the pattern table score when the board
+# uses one (see patterns.py)
+def evaluate_board(board, player):
+    if board.patterns is not None:
+        return board.patterns.evaluate(player)
+    return board.scores[player] - board.scores[opponent_of(player)]
+
+
+# Kept up to date by Board.place / Board.undo, so this is O(1) (not while the board
+# evaluates with a pattern table, see Board.use_patterns)
+def score_lines(board, player):
+    return board.scores[player]
+
+
+# Full rescan of every window, used to check the incremental scores
+def score_lines_scan(board, player):
+    rows, cols, grid = board.rows, board.cols, board.grid
+    length = board.win_length
+    span = length - 1
+    score = 0
+    lines = []
+    # Horizontal, vertical, diagonal, anti-diagonal
+    for row in range(rows):
+        for col in range(cols - span):
+            lines.append([grid[row][col + i] for i in range(length)])
+    for row in range(rows - span):
+        for col in range(cols):
+            lines.append([grid[row + i][col] for i in range(length)])
+    for row in range(rows - span):
+        for col in range(cols - span):
+            lines.append([grid[row + i][col + i] for i in range(length)])
+    for row in range(span, rows):
+        for col in range(cols - span):
+            lines.append([grid[row - i][col + i] for i in range(length)])
+
+    weights = line_weights(length)
+    for line in lines:
+        count = line.count(player)
+        if count and count + line.count(EMPTY) == length:
+            score += weights[count]
+    return score
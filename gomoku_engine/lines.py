@@ -0,0 +1,114 @@
+# Windows of WIN_LENGTH cells ("lines") of the board, the score tables used to keep
+# the evaluation up to date one stone at a time, and the cell neighbourhoods
+# used for move generation. Everything is built per win length and board size.
+WIN_LENGTH = 5  # Default stones in a row needed to win
+
+
+# Score of a window by stone count: (0, 10, 100, ...) up to 10 ** win_length
+def line_weights(win_length=WIN_LENGTH):
+    return (0,) + tuple(10 ** count for count in range(1, win_length + 1))
+
+
+LINE_WEIGHTS = line_weights()
+
+
+# A window's state packs both stone counts: PLAYER count * (win_length + 1) + AI count
+def state_step(win_length=WIN_LENGTH):
+    return (0, win_length + 1, 1)  # Indexed by PLAYER / AI
+
+
+# Score a window in `state` is worth to `player` (only counts if the opponent is absent)
+def window_score(state, player, win_length=WIN_LENGTH):
+    player_count, ai_count = divmod(state, win_length + 1)
+    weights = line_weights(win_length)
+    if player == 1:  # PLAYER
+        return weights[player_count] if ai_count == 0 else 0
+    return weights[ai_count] if player_count == 0 else 0
+
+
+def _build_gain_tables(win_length):
+    # Indexed [mover][scored][state]: change in `scored`'s total when `mover`
+    # adds a stone to a window that was in `state`
+    tables = [None]
+    for mover in (1, 2):
+        step = state_step(win_length)[mover]
+        per_scored = [None]
+        for scored in (1, 2):
+            gains = []
+            for state in range((win_length + 1) ** 2):
+                player_count, ai_count = divmod(state, win_length + 1)
+                if player_count + ai_count < win_length:
+                    gains.append(window_score(state + step, scored, win_length) -
+                                 window_score(state, scored, win_length))
+                else:
+                    gains.append(0)  # Full window, no stone can be added
+            per_scored.append(gains)
+        tables.append(per_scored)
+    return tables
+
+
+_gain_tables = {}
+
+
+def get_score_gain(win_length=WIN_LENGTH):
+    if win_length not in _gain_tables:
+        _gain_tables[win_length] = _build_gain_tables(win_length)
+    return _gain_tables[win_length]
+
+
+_geometries = {}
+
+
+# Windows of a rows x cols board as tuples of bit indices, plus the windows covering each cell
+def get_geometry(rows, cols, win_length=WIN_LENGTH):
+    key = (rows, cols, win_length)
+    if key not in _geometries:
+        stride = cols + 1
+        windows = []
+        for row in range(rows):
+            for col in range(cols):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                    end_row = row + d_row * (win_length - 1)
+                    end_col = col + d_col * (win_length - 1)
+                    if 0 <= end_row < rows and end_col < cols:
+                        windows.append(tuple((row + d_row * i) * stride + col + d_col * i
+                                             for i in range(win_length)))
+        cell_windows = [[] for _ in range(rows * stride)]
+        for window_id, cells in enumerate(windows):
+            for index in cells:
+                cell_windows[index].append(window_id)
+        _geometries[key] = (windows, [tuple(ids) for ids in cell_windows])
+    return _geometries[key]
+
+
+_cell_moves = {}
+
+
+# The (row, col) tuple of every bit index of a rows x cols board, built once so moves can be
+# handed out without allocating a tuple each time
+def get_cell_moves(rows, cols):
+    key = (rows, cols)
+    if key not in _cell_moves:
+        stride = cols + 1
+        _cell_moves[key] = tuple(divmod(index, stride) for index in range(rows * stride))
+    return _cell_moves[key]
+
+
+_neighbors = {}
+
+
+# For each cell, the bit indices of the up to 8 cells around it
+def get_neighbors(rows, cols):
+    key = (rows, cols)
+    if key not in _neighbors:
+        stride = cols + 1
+        neighbors = [() for _ in range(rows * stride)]
+        for row in range(rows):
+            for col in range(cols):
+                neighbors[row * stride + col] = tuple(
+                    r * stride + c
+                    for r in range(max(0, row - 1), min(rows, row + 2))
+                    for c in range(max(0, col - 1), min(cols, col + 2))
+                    if (r, c) != (row, col))
+        _neighbors[key] = neighbors
+    return _neighbors[key]
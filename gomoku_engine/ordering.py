@@ -0,0 +1,84 @@
+import math
+
+from .board import PLAYER, RENJU, get_valid_moves, opponent_of
+from .transposition import NO_MOVE
+
+KILLER_BONUS = 2000
+HISTORY_MAX = 1000
+
+
+# How much playing at `index` changes the evaluation for `player`: the lines it
+# builds for itself plus the opponent lines it blocks
+def move_gain(board, index, player):
+    state = board.window_state
+    own_gain = board.score_gain[player][player]
+    blocked = board.score_gain[player][opponent_of(player)]
+    gain = 0
+    for window in board.cell_windows[index]:
+        before = state[window]
+        gain += own_gain[before] - blocked[before]
+    return gain
+
+
+# Orders candidate moves best-first: the transposition table move, then by line gain,
+# killer moves (quiet moves that caused a cutoff at the same ply) and the history
+# heuristic. beam_width keeps only the best K moves. Renju-style forbidden moves are left out
+# (unless no other move is left).
+# Scores go into one array reused by every node, so ordering builds no per-move tuples.
+class MoveOrderer:
+    def __init__(self, beam_width=None):
+        self.beam_width = beam_width
+        self.killers = {}  # ply -> [newest, older] move indices
+        self.history = {}  # (player, index) -> cutoff score
+        self.scores = []  # Score of each bit index at the node being ordered
+
+    def new_search(self):
+        self.killers.clear()
+        for key in self.history:
+            self.history[key] //= 2
+
+    def order(self, board, player, tt_move=NO_MOVE):
+        if not board.history:
+            return get_valid_moves(board)
+        killers = self.killers.get(len(board.history), ())
+        history = self.history
+        cell_moves = board.cell_moves
+        scores = self.scores
+        if len(scores) < len(cell_moves):
+            scores.extend([0] * (len(cell_moves) - len(scores)))
+        indices = sorted(board.candidates)
+        if board.rule == RENJU and player == PLAYER:
+            # As in get_valid_moves, a position where every move is forbidden keeps them all
+            indices = [index for index in indices if not board.is_forbidden(*cell_moves[index], player)] or indices
+        # move_gain inlined, with its tables looked up once per node
+        state = board.window_state
+        cell_windows = board.cell_windows
+        own_gain = board.score_gain[player][player]
+        blocked = board.score_gain[player][opponent_of(player)]
+        for index in indices:
+            if index == tt_move:
+                scores[index] = math.inf
+                continue
+            score = history.get((player, index), 0)
+            for window in cell_windows[index]:
+                before = state[window]
+                score += own_gain[before] - blocked[before]
+            if index in killers:
+                score += KILLER_BONUS
+            scores[index] = score
+        # A stable sort, so equal scores stay in board order
+        indices.sort(key=scores.__getitem__, reverse=True)
+        if self.beam_width is not None:
+            del indices[self.beam_width:]
+        return [cell_moves[index] for index in indices]
+
+    # Records a move that produced a beta cutoff at the current ply
+    def cutoff(self, board, player, row, col, depth):
+        index = row * board.stride + col
+        killers = self.killers.setdefault(len(board.history), [])
+        if index not in killers:
+            killers.insert(0, index)
+            del killers[2:]
+        key = (player, index)
+        history = self.history
+        history[key] = min(history.get(key, 0) + depth * depth, HISTORY_MAX)
@@ -0,0 +1,127 @@
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .ordering import MoveOrderer
+from .positions import board_from_stones, board_stones, position_boards, side_to_move
+from .search import SearchControl, SearchResult, alphabeta
+from .transposition import DEFAULT_TABLE_BYTES, TranspositionTable
+
+# Per-process state of pool workers: each reuses one transposition table, cleared for every
+# task so a result never depends on which tasks the worker ran before
+_worker_tt = None
+
+
+def _init_worker(tt_bytes):
+    global _worker_tt
+    _worker_tt = TranspositionTable(tt_bytes)
+
+
+# Searches one root move in a worker: plays it, then runs alphabeta with the given window
+def _search_root_move(shape, moves, move, player, depth, alpha, beta, seed):
+    if seed is not None:
+        random.seed(seed)
+    board = board_from_stones(shape, moves)
+    board.place(move[0], move[1], player)
+    if _worker_tt is not None:
+        tt = _worker_tt
+        tt.clear()
+    else:
+        tt = TranspositionTable()
+    tt.new_search()
+    control = SearchControl()
+    _, _, score = alphabeta(board, depth - 1, alpha, beta, player, False, tt, control, MoveOrderer())
+    return score, control.nodes
+
+
+# Root-split parallel alphabeta. The first (best-ordered) root move is searched alone to
+# get a score, every other root move is then searched in the process pool with a null
+# window around it, and moves that fail high are searched again with a full window.
+# Ties go to the earlier root move and every task starts from an empty transposition table,
+# so with a seed the result does not depend on worker count, scheduling or earlier searches.
+class ParallelSearcher:
+    def __init__(self, workers=None, tt_bytes=DEFAULT_TABLE_BYTES, seed=None, beam_width=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.beam_width = beam_width
+        self.tt = TranspositionTable(tt_bytes)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(tt_bytes,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _task_seed(self, index):
+        return None if self.seed is None else self.seed * 1000003 + index
+
+    def search(self, board, player, depth):
+        start = time.perf_counter()
+        moves = MoveOrderer(self.beam_width).order(board, player)
+        history = board_stones(board)
+        args = ((board.rows, board.cols, board.win_length, board.rule), history)
+
+        if self.seed is not None:
+            random.seed(self._task_seed(0))
+        self.tt.clear()
+        self.tt.new_search()
+        control = SearchControl()
+        board.place(moves[0][0], moves[0][1], player)
+        _, _, best_score = alphabeta(board, depth - 1, -math.inf, math.inf, player, False, self.tt, control,
+                                     MoveOrderer())
+        board.undo()
+        best_move = moves[0]
+        nodes = control.nodes
+
+        # Null-window probes for the remaining root moves
+        futures = [(index, move, self.pool.submit(_search_root_move, *args, move, player, depth,
+                                                  best_score, best_score + 1, self._task_seed(index)))
+                   for index, move in enumerate(moves[1:], 1)]
+        fail_high = []
+        for index, move, future in futures:
+            score, task_nodes = future.result()
+            nodes += task_nodes
+            if score > best_score:
+                fail_high.append((index, move))
+
+        # Exact scores for the moves that beat the first one
+        futures = [(move, self.pool.submit(_search_root_move, *args, move, player, depth,
+                                           best_score, math.inf, self._task_seed(index)))
+                   for index, move in fail_high]
+        for move, future in futures:
+            score, task_nodes = future.result()
+            nodes += task_nodes
+            if score > best_score:
+                best_score, best_move = score, move
+
+        return SearchResult(*best_move, best_score, depth, nodes, time.perf_counter() - start, [best_move])
+
+
+# Times the same positions at each worker count; returns {workers: (seconds, nodes)}
+def speedup_curve(boards, depth, worker_counts=(1, 2, 4, 8), seed=0):
+    curve = {}
+    for workers in worker_counts:
+        with ParallelSearcher(workers, seed=seed) as searcher:
+            start = time.perf_counter()
+            nodes = 0
+            for board in boards:
+                nodes += searcher.search(board, side_to_move(board), depth).nodes
+            curve[workers] = (time.perf_counter() - start, nodes)
+    return curve
+
+
+if __name__ == "__main__":
+    search_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"Root-parallel alphabeta, depth {search_depth}, {os.cpu_count()} CPUs available")
+    results = speedup_curve(position_boards('midgame'), search_depth)
+    base_time = results[1][0]
+    for worker_count, (seconds, node_count) in results.items():
+        print(f"{worker_count} workers: {seconds:.2f}s, {node_count} nodes, speedup {base_time / seconds:.2f}x")
@@ -0,0 +1,415 @@
+import argparse
+import json
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .board import AI, COLS, PLAYER, ROWS
+from .lines import WIN_LENGTH
+from .records import GameRecord, RecordWriter, Replay, read_records
+
+# Pattern evaluation: the board is cut into segments of win_length + 1 cells in the four
+# directions, one cell longer than a window so a segment also sees whether a run is open at
+# both ends. A segment holding one colour only is worth the weight of its pattern (its
+# stones and gaps, e.g. '_xxx__', mirror images sharing a weight), with separate weights for
+# the side to move (attack) and the side that just moved (defence), since the same open
+# three wins for one and must be blocked by the other. Weights are tuned offline on
+# self-play game records by logistic regression of the game result on pattern counts.
+# make/unmake do not touch the segments one by one: every whole board line (row, column or
+# diagonal) keeps a ternary code (empty 0, PLAYER 1, AI 2, one digit per cell) that a stone
+# changes with one addition, and the value of a line code, the sum over its segments, is
+# looked up in a cache. A move updates at most 4 lines, where the line scores update every
+# window through the cell.
+SCORE_SCALE = 1000  # Evaluation points per unit of trained log-odds
+PACK_BITS = 32
+PACK = 1 << PACK_BITS  # Both sides' sums share one int; each stays well inside +-PACK / 2
+PACK_HALF = PACK // 2
+MAX_LINE_CACHE = 1 << 18  # Line values cached per line length before the cache starts over
+TRAIN_SKIP_PLIES = 4  # Early positions left out of training (mostly random opening stones)
+
+_line_geometries = {}
+
+
+# Board lines (rows, columns and diagonals) of at least `length` cells on a rows x cols
+# board, as lists of bit indices, and, indexed by PLAYER / AI and by bit index, the
+# (line, code change) pairs of the lines through each cell
+def get_line_geometry(rows, cols, length):
+    key = (rows, cols, length)
+    if key not in _line_geometries:
+        stride = cols + 1
+        lines = []
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+            for row in range(rows):
+                for col in range(cols):
+                    if 0 <= row - d_row < rows and 0 <= col - d_col < cols:
+                        continue  # Not the first cell of its line
+                    cells = []
+                    r, c = row, col
+                    while 0 <= r < rows and 0 <= c < cols:
+                        cells.append(r * stride + c)
+                        r, c = r + d_row, c + d_col
+                    if len(cells) >= length:
+                        lines.append(cells)
+        cell_lines = [[] for _ in range(rows * stride)]
+        for line, cells in enumerate(lines):
+            for i, index in enumerate(cells):
+                cell_lines[index].append((line, 3 ** i))
+        deltas = [None] + [[tuple((line, power * player) for line, power in pairs) for pairs in cell_lines]
+                           for player in (PLAYER, AI)]
+        _line_geometries[key] = (lines, deltas)
+    return _line_geometries[key]
+
+
+# Name of a one-colour segment, read from whichever end gives the smaller string
+def pattern_name(stones):
+    text = ''.join('x' if stone else '_' for stone in stones)
+    return min(text, text[::-1])
+
+
+# Every pattern that gets a weight: one colour, at least one stone, no completed line
+def pattern_names(win_length=WIN_LENGTH):
+    length = win_length + 1
+    names = set()
+    for mask in range(1, 2 ** length):
+        name = pattern_name([mask >> i & 1 for i in range(length)])
+        if 'x' * win_length not in name:
+            names.add(name)
+    return sorted(names)
+
+
+# (owner, pattern name) of every segment code; owner is None for empty, mixed or won segments
+def _code_patterns(win_length):
+    length = win_length + 1
+    patterns = []
+    for code in range(3 ** length):
+        digits = [code // 3 ** i % 3 for i in range(length)]
+        owners = set(digits) - {0}
+        if len(owners) != 1:
+            patterns.append((None, None))
+            continue
+        name = pattern_name(digits)
+        patterns.append((owners.pop(), name) if 'x' * win_length not in name else (None, None))
+    return patterns
+
+
+# Codes of the segments of `length` cells, in order, in a line of `size` cells with code `code`
+def segment_codes(code, size, length):
+    top = 3 ** (length - 1)
+    segment = 0
+    codes = []
+    for i in range(size):
+        code, digit = divmod(code, 3)
+        segment = segment // 3 + digit * top
+        if i >= length - 1:
+            codes.append(segment)
+    return codes
+
+
+# Segment values built from pattern weights ({'attack': {name: points}, 'defense': {...}}).
+# values[mover][code] is what a segment in `code` adds to the evaluation from the point of
+# view of `mover`, when `mover` is the side to move; packed[code] holds both as
+# values[PLAYER][code] * PACK + values[AI][code], so one number carries both sums.
+class PatternTable:
+    def __init__(self, weights, win_length=WIN_LENGTH):
+        self.win_length = win_length
+        self.length = win_length + 1
+        self.weights = weights
+        attack, defense = weights['attack'], weights['defense']
+        self.code_patterns = _code_patterns(win_length)
+        self.values = [None]
+        for mover in (PLAYER, AI):
+            values = []
+            for owner, name in self.code_patterns:
+                if owner is None:
+                    values.append(0)
+                elif owner == mover:
+                    values.append(attack.get(name, 0))
+                else:
+                    values.append(-defense.get(name, 0))
+            self.values.append(values)
+        self.packed = [player_value * PACK + ai_value
+                       for player_value, ai_value in zip(self.values[PLAYER], self.values[AI])]
+        self.line_caches = {}  # Line size -> {line code: packed value}
+        self.updates = {}  # (rows, cols) -> line sizes and cell_updates tables
+
+    # Packed value of a line of `size` cells in `code`, stored in the line cache
+    def line_value(self, code, size):
+        cache = self.line_caches[size]
+        if len(cache) >= MAX_LINE_CACHE:
+            cache.clear()
+        packed = self.packed
+        value = cache[code] = sum(packed[segment] for segment in segment_codes(code, size, self.length))
+        return value
+
+    # Sizes of the lines on a rows x cols board and, indexed by PLAYER / AI and by bit index,
+    # (line, code change, line cache, line size) for each line through the cell
+    def cell_updates(self, rows, cols):
+        key = (rows, cols)
+        if key not in self.updates:
+            lines, deltas = get_line_geometry(rows, cols, self.length)
+            sizes = [len(cells) for cells in lines]
+            for size in sizes:
+                self.line_caches.setdefault(size, {})
+            updates = [None] + [[tuple((line, delta, self.line_caches[sizes[line]], sizes[line])
+                                       for line, delta in cell) for cell in deltas[player]]
+                                for player in (PLAYER, AI)]
+            self.updates[key] = (sizes, updates)
+        return self.updates[key]
+
+    def new_state(self, board):
+        if board.win_length != self.win_length:
+            raise ValueError(f"Pattern weights are for {self.win_length} in a row, not {board.win_length}")
+        return PatternState(self, board)
+
+    def to_json(self):
+        return {'win_length': self.win_length, 'attack': self.weights['attack'], 'defense': self.weights['defense']}
+
+
+# Line codes of one board, their values and the evaluation for each side to move, kept up
+# to date by Board.make / Board.unmake
+class PatternState:
+    def __init__(self, table, board):
+        self.table = table
+        self.sizes, self.cell_updates = table.cell_updates(board.rows, board.cols)
+        self.codes = [0] * len(self.sizes)
+        self.values = [0] * len(self.sizes)  # Packed value of each line
+        self.total = 0  # Sum of the line values
+        self.to_move = PLAYER
+        for row, col in board.history:
+            self.place(row * board.stride + col, board.grid[row][col])
+
+    def place(self, index, player):
+        codes = self.codes
+        values = self.values
+        total = self.total
+        for line, delta, cache, size in self.cell_updates[player][index]:
+            code = codes[line] + delta
+            codes[line] = code
+            value = cache.get(code)
+            if value is None:
+                value = self.table.line_value(code, size)
+            total += value - values[line]
+            values[line] = value
+        self.total = total
+        self.to_move = AI if player == PLAYER else PLAYER
+
+    def undo(self, index, player):
+        codes = self.codes
+        values = self.values
+        total = self.total
+        for line, delta, cache, size in self.cell_updates[player][index]:
+            code = codes[line] - delta
+            codes[line] = code
+            value = cache.get(code)
+            if value is None:
+                value = self.table.line_value(code, size)
+            total += value - values[line]
+            values[line] = value
+        self.total = total
+        self.to_move = player
+
+    def clear(self):
+        self.codes = [0] * len(self.codes)
+        self.values = [0] * len(self.values)
+        self.total = 0
+        self.to_move = PLAYER
+
+    # Evaluation from `player`'s point of view, for the side to move after the last stone
+    def evaluate(self, player):
+        to_move = self.to_move
+        total = self.total + PACK_HALF
+        if to_move == PLAYER:
+            score = total >> PACK_BITS  # PLAYER's sum
+        else:
+            score = (total & (PACK - 1)) - PACK_HALF  # AI's sum
+        return score if player == to_move else -score
+
+    # Pattern counts of the position as {feature: count}: feature i counts pattern i for the
+    # side to move and feature len(names) + i counts it (negated) for the other side
+    def features(self, to_move, name_index):
+        features = {}
+        code_patterns = self.table.code_patterns
+        defense_offset = len(name_index)
+        for line, code in enumerate(self.codes):
+            if not code:
+                continue
+            for segment in segment_codes(code, self.sizes[line], self.table.length):
+                owner, name = code_patterns[segment]
+                if owner == to_move:
+                    feature = name_index[name]
+                    features[feature] = features.get(feature, 0) + 1
+                elif owner is not None:
+                    feature = defense_offset + name_index[name]
+                    features[feature] = features.get(feature, 0) - 1
+        return features
+
+
+def load_pattern_table(path):
+    with open(path) as weights_file:
+        data = json.load(weights_file)
+    return PatternTable({'attack': data['attack'], 'defense': data['defense']}, data['win_length'])
+
+
+_default_tables = {}
+
+
+# The PatternTable of DEFAULT_WEIGHTS (shared, built on first use)
+def default_pattern_table():
+    if WIN_LENGTH not in _default_tables:
+        _default_tables[WIN_LENGTH] = PatternTable(DEFAULT_WEIGHTS)
+    return _default_tables[WIN_LENGTH]
+
+
+# Plays `games` games of `spec` against itself from random openings on a process pool and
+# appends them to the record file at `path`; returns the number of games written
+def self_play(path, games, spec, opening_plies=6, seed=0, workers=None, rows=ROWS, cols=COLS):
+    from .tournament import play_game, random_opening  # tournament imports engines, which import this module
+    rng = random.Random(seed)
+    jobs = [(game_id, spec, spec, random_opening(rows, cols, opening_plies, rng), rng.getrandbits(32), rows, cols)
+            for game_id in range(games)]
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, RecordWriter(path) as writer:
+        futures = [pool.submit(play_game, *job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            writer.write(GameRecord(result['moves'], result['winner'], rows, cols))
+            written += 1
+    return written
+
+
+# Distinct pattern-count vectors of the records' positions after the opening, as
+# [(features, positions, summed result for the side to move)], and the pattern names
+def training_positions(records, win_length=WIN_LENGTH, skip_plies=TRAIN_SKIP_PLIES):
+    names = pattern_names(win_length)
+    name_index = {name: index for index, name in enumerate(names)}
+    counter = PatternTable({'attack': {}, 'defense': {}}, win_length)
+    merged = {}
+    for record in records:
+        if record.result == '*' or record.win_length != win_length:
+            continue
+        replay = Replay(record)
+        replay.board.use_patterns(counter)
+        for ply, board, to_move, _ in replay.positions(skip_plies):
+            if record.result == 'draw':
+                target = 0.5
+            else:
+                target = 1.0 if (record.result == 'black') == (to_move == PLAYER) else 0.0
+            key = tuple(sorted(board.patterns.features(to_move, name_index).items()))
+            count, total = merged.get(key, (0, 0.0))
+            merged[key] = (count + 1, total + target)
+    return names, [(dict(key), count, total) for key, (count, total) in merged.items()]
+
+
+def _sigmoid(z):
+    if z < -30:
+        return 0.0
+    if z > 30:
+        return 1.0
+    return 1 / (1 + math.exp(-z))
+
+
+# Logistic regression of the result on the pattern counts (Adam, full batch, L2 penalty);
+# returns the weights in log-odds and the final log loss
+def fit(positions, feature_count, epochs=300, learning_rate=0.05, l2=1e-4, progress=None):
+    position_count = sum(count for _, count, _ in positions)
+    theta = [0.0] * feature_count
+    first = [0.0] * feature_count
+    second = [0.0] * feature_count
+    for epoch in range(1, epochs + 1):
+        gradient = [0.0] * feature_count
+        loss = 0.0
+        for features, count, total in positions:
+            z = 0.0
+            for feature, value in features.items():
+                z += theta[feature] * value
+            p = _sigmoid(z)
+            loss -= total * math.log(max(p, 1e-12)) + (count - total) * math.log(max(1 - p, 1e-12))
+            error = p * count - total
+            for feature, value in features.items():
+                gradient[feature] += error * value
+        for feature in range(feature_count):
+            g = gradient[feature] / position_count + l2 * theta[feature]
+            first[feature] = 0.9 * first[feature] + 0.1 * g
+            second[feature] = 0.999 * second[feature] + 0.001 * g * g
+            step = first[feature] / (1 - 0.9 ** epoch) / (math.sqrt(second[feature] / (1 - 0.999 ** epoch)) + 1e-8)
+            theta[feature] -= learning_rate * step
+        if progress is not None:
+            progress(epoch, loss / position_count)
+    return theta, loss / position_count
+
+
+# Trains pattern weights (in evaluation points) from game records
+def train(records, win_length=WIN_LENGTH, epochs=300, learning_rate=0.05, l2=1e-4, progress=None):
+    names, positions = training_positions(records, win_length)
+    if not positions:
+        raise ValueError("No finished games to train on")
+    theta, loss = fit(positions, 2 * len(names), epochs, learning_rate, l2, progress)
+    position_count = sum(count for _, count, _ in positions)
+    weights = {
+        'attack': {name: round(theta[index] * SCORE_SCALE) for index, name in enumerate(names)},
+        'defense': {name: round(theta[len(names) + index] * SCORE_SCALE) for index, name in enumerate(names)},
+    }
+    return PatternTable(weights, win_length), position_count, loss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play and training for the pattern evaluation")
+    commands = parser.add_subparsers(dest='command', required=True)
+    play = commands.add_parser('selfplay', help="append self-play games to a record file")
+    play.add_argument('records')
+    play.add_argument('--games', type=int, default=1000)
+    play.add_argument('--engine', default='alphabeta:depth=2,order=1')
+    play.add_argument('--opening-plies', type=int, default=6)
+    play.add_argument('--seed', type=int, default=0)
+    play.add_argument('--workers', type=int, default=None)
+    fit_parser = commands.add_parser('train', help="fit pattern weights to game records")
+    fit_parser.add_argument('records', nargs='+')
+    fit_parser.add_argument('--output', required=True, help="JSON file for the weights")
+    fit_parser.add_argument('--epochs', type=int, default=300)
+    fit_parser.add_argument('--learning-rate', type=float, default=0.05)
+    fit_parser.add_argument('--l2', type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    if args.command == 'selfplay':
+        written = self_play(args.records, args.games, args.engine, args.opening_plies, args.seed, args.workers)
+        print(f"Wrote {written} games to {args.records}", file=sys.stderr)
+        return written
+
+    def progress(epoch, loss):
+        if epoch % 25 == 0:
+            print(f"epoch {epoch}: log loss {loss:.4f}", file=sys.stderr)
+
+    records = (record for path in args.records for record in read_records(path))
+    table, positions, loss = train(records, epochs=args.epochs, learning_rate=args.learning_rate, l2=args.l2,
+                                   progress=progress)
+    with open(args.output, 'w') as weights_file:
+        json.dump(table.to_json(), weights_file, indent=1, sort_keys=True)
+    print(f"Trained on {positions} positions, log loss {loss:.4f}; wrote {args.output}", file=sys.stderr)
+    return table
+
+
+# Weights trained with `python -m gomoku_engine.patterns train` on 4000 self-play games of
+# alphabeta:depth=2,order=1 (6 random opening stones each)
+DEFAULT_WEIGHTS = {
+    'attack': {
+        '_____x': 6, '____x_': 17, '____xx': 51, '___x__': 22, '___x_x': 94, '___xx_': 81, '___xxx': 390,
+        '__x__x': 83, '__x_x_': 54, '__x_xx': 308, '__xx__': 200, '__xx_x': 609, '__xxx_': 581,
+        '__xxxx': 2258, '_x___x': 11, '_x__x_': -2, '_x__xx': 122, '_x_x_x': 295, '_x_xx_': 1004,
+        '_x_xxx': 950, '_xx__x': 59, '_xx_xx': 280, '_xxx_x': 576, '_xxxx_': 2478, 'x____x': -109,
+        'x___xx': -28, 'x__x_x': 103, 'x__xxx': 282, 'x_x_xx': 196, 'x_xx_x': 61, 'x_xxxx': 102,
+        'xx__xx': 46, 'xx_xxx': 1,
+    },
+    'defense': {
+        '_____x': -4, '____x_': 7, '____xx': 45, '___x__': 18, '___x_x': 90, '___xx_': 67, '___xxx': 314,
+        '__x__x': 81, '__x_x_': 41, '__x_xx': 244, '__xx__': 175, '__xx_x': 409, '__xxx_': 303,
+        '__xxxx': 893, '_x___x': 22, '_x__x_': -9, '_x__xx': 120, '_x_x_x': 242, '_x_xx_': 267,
+        '_x_xxx': 601, '_xx__x': 51, '_xx_xx': 489, '_xxx_x': 673, '_xxxx_': 3964, 'x____x': -61,
+        'x___xx': -26, 'x__x_x': 131, 'x__xxx': 307, 'x_x_xx': 236, 'x_xx_x': 408, 'x_xxxx': 364,
+        'xx__xx': 306, 'xx_xxx': 108,
+    },
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from .ordering import MoveOrderer
+from .search import principal_variation
+
+PONDER_REPLIES = 4  # Opponent replies searched ahead while the opponent thinks
+
+
+# Searches on the opponent's time. ponder() plays each of the opponent's likeliest replies
+# (the one the engine's principal variation expects first, then the best by MoveOrderer)
+# and runs `search(board, stop_event)` on the resulting position, caching the answer.
+# take() returns the cached answer when the opponent plays a pondered move; the cache is
+# then dropped, while whatever the searches added to a shared transposition table stays.
+class Ponderer:
+    def __init__(self, search, tt=None, max_replies=PONDER_REPLIES):
+        self.search = search
+        self.tt = tt
+        self.max_replies = max_replies
+        self.replies = {}  # Opponent move -> finished answer
+        self.hits = 0
+        self.misses = 0
+
+    def predicted_replies(self, board, player):
+        moves = MoveOrderer().order(board, player)
+        if self.tt is not None:
+            expected = principal_variation(board, player, self.tt, 1)
+            if expected and expected[0] in moves:
+                moves.remove(expected[0])
+                moves.insert(0, expected[0])
+        return moves[:self.max_replies]
+
+    # `player` is the opponent, who is about to move on `board`. Stops when stop_event is set;
+    # an answer whose search was interrupted is not kept.
+    def ponder(self, board, player, stop_event=None):
+        self.replies.clear()
+        for row, col in self.predicted_replies(board, player):
+            if stop_event is not None and stop_event.is_set():
+                break
+            board.place(row, col, player)
+            if board.last_move_wins() or board.is_full():
+                board.undo()
+                continue
+            answer = self.search(board, stop_event)
+            board.undo()
+            if stop_event is not None and stop_event.is_set():
+                break
+            self.replies[(row, col)] = answer
+
+    # Answer for the opponent's actual move, or None; forgets every other pondered reply
+    def take(self, move):
+        answer = self.replies.get(move)
+        self.replies.clear()
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
@@ -0,0 +1,60 @@
+from .board import COLS, FREESTYLE, PLAYER, ROWS, Board, opponent_of
+from .lines import WIN_LENGTH
+
+# Curated positions for benchmarks, as move lists starting with PLAYER. `expected` lists
+# the moves that are correct for the side to move where the position has a clear answer.
+POSITIONS = [
+    {'name': 'center-start', 'category': 'opening', 'moves': [(7, 7)], 'expected': None},
+    {'name': 'diagonal-start', 'category': 'opening', 'moves': [(7, 7), (6, 8), (8, 8)], 'expected': None},
+    {'name': 'direct-opening', 'category': 'opening',
+     'moves': [(7, 7), (7, 8), (8, 7), (6, 7)], 'expected': None},
+    {'name': 'crossfire', 'category': 'midgame',
+     'moves': [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (9, 7), (6, 8), (5, 9), (8, 6), (8, 9)],
+     'expected': None},
+    {'name': 'knots', 'category': 'midgame',
+     'moves': [(7, 7), (8, 8), (6, 8), (8, 6), (8, 7), (6, 7), (7, 9), (7, 6)], 'expected': None},
+    {'name': 'ladder', 'category': 'midgame',
+     'moves': [(7, 7), (6, 7), (7, 8), (7, 6), (5, 6), (8, 9), (6, 8), (9, 10), (5, 8), (4, 8), (6, 9)],
+     'expected': None},
+    {'name': 'finish-four', 'category': 'tactical',
+     'moves': [(7, 4), (0, 0), (7, 5), (0, 14), (7, 6), (14, 0), (7, 7), (14, 14)],
+     'expected': [(7, 3), (7, 8)]},
+    {'name': 'block-four', 'category': 'tactical',
+     'moves': [(7, 7), (3, 4), (2, 4), (4, 4), (10, 2), (5, 4), (12, 9), (6, 4)],
+     'expected': [(7, 4)]},
+    {'name': 'open-three', 'category': 'tactical',
+     'moves': [(7, 6), (0, 0), (7, 7), (0, 14), (7, 8), (14, 14)],
+     'expected': [(7, 5), (7, 9)]},
+]
+
+
+def build_board(moves, rows=ROWS, cols=COLS, win_length=WIN_LENGTH, rule=FREESTYLE):
+    board = Board(rows, cols, win_length, rule)
+    player = PLAYER
+    for row, col in moves:
+        board.place(row, col, player)
+        player = opponent_of(player)
+    return board
+
+
+# The stones of `board` in play order as (row, col, player), so the board can be rebuilt in
+# another process with board_from_stones
+def board_stones(board):
+    return [(row, col, board[row][col]) for row, col in board.history]
+
+
+# Board of `shape` ((rows, cols, win_length, rule)) with `stones` placed in order
+def board_from_stones(shape, stones):
+    board = Board(*shape)
+    for row, col, player in stones:
+        board.place(row, col, player)
+    return board
+
+
+def side_to_move(board):
+    return opponent_of(board.last_player()) if board.history else PLAYER
+
+
+def position_boards(category=None):
+    return [build_board(position['moves']) for position in POSITIONS
+            if category is None or position['category'] == category]
@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .board import AI, EXACT_FIVE, FREESTYLE, PLAYER, RENJU, Board, opponent_of
+from .engines import Engine
+from .lines import WIN_LENGTH
+from .positions import board_from_stones, board_stones
+
+# Gomocup (piskvork) brain protocol: the manager sends one command per line and the engine
+# answers moves as "x,y", x being the column and y the row, both from 0. Supported commands:
+# START size, RECTSTART width,height, RESTART, BEGIN, TURN x,y, BOARD (then x,y,field lines
+# and DONE, field 1 for our stones and 2 for the opponent's), TAKEBACK x,y, INFO key value,
+# ABOUT and END. Sessions run on an asyncio front end (stdin/stdout or a local socket, many
+# connections at once) and every search goes to a shared process pool.
+DEFAULT_ENGINE = 'id:threats=1'
+DEFAULT_TIMEOUT_TURN = 5000  # Milliseconds per move until the manager sends INFO timeout_turn
+TIME_MARGIN = 0.1  # Seconds kept back from each move for communication
+MIN_MOVE_SECONDS = 0.05  # Search time when the clock is (nearly) out or timeout_turn is 0
+MOVES_TO_GO = 20  # A move may use at most this share of the match time left
+ABOUT = 'name="gomoku_engine", version="1.0", author="Gomoku_Game", country="-"'
+
+SEARCH = 'search'  # Session.handle result asking for a move to be searched
+RULE_EXACT = 1  # INFO rule bits
+RULE_RENJU = 4
+
+# Per-process state of pool workers: one Engine per (spec, board shape), kept between moves
+_worker_engines = {}
+
+
+# Searches one move in a worker; the time left before `deadline` (time.time() based) is
+# used, so moves that waited for a free worker still answer in time
+def search_move(spec, shape, moves, player, deadline):
+    engine = _worker_engines.get((spec, shape))
+    if engine is None:
+        engine = _worker_engines[(spec, shape)] = Engine(spec)
+    board = board_from_stones(shape, moves)
+    return engine.choose_move(board, player, max(MIN_MOVE_SECONDS, deadline - time.time()))
+
+
+def _parse_numbers(text, count):
+    values = [int(value) for value in text.split(',')]
+    if len(values) != count:
+        raise ValueError
+    return values
+
+
+# Protocol state of one game: board, rule and time controls. handle() takes one line and
+# returns the lines to answer, or SEARCH when a move must be searched first (search_request()
+# then gives the search_move arguments and play() answers with the move found).
+class Session:
+    def __init__(self, spec=DEFAULT_ENGINE):
+        self.spec = spec
+        self.board = None
+        self.rule = FREESTYLE
+        self.timeout_turn = DEFAULT_TIMEOUT_TURN
+        self.time_left = None  # Milliseconds left in the match, when the manager tells
+        self.pending_stones = None  # (x, y, field) lines of a BOARD command being read
+        self.ended = False
+
+    def handle(self, line):
+        if self.pending_stones is not None:
+            return self._board_line(line)
+        command, _, argument = line.strip().partition(' ')
+        command = command.upper()
+        if not command:
+            return []
+        try:
+            if command == 'START':
+                return self._start(*_parse_numbers(argument, 1) * 2)
+            if command == 'RECTSTART':
+                width, height = _parse_numbers(argument, 2)
+                return self._start(width, height)
+            if command == 'INFO':
+                self._info(*argument.partition(' ')[::2])
+                return []
+            if command == 'ABOUT':
+                return [ABOUT]
+            if command == 'END':
+                self.ended = True
+                return []
+            if self.board is None:
+                return ["ERROR no board, send START first"]
+            if command == 'RESTART':
+                self.board.reset()
+                return ['OK']
+            if command == 'BEGIN':
+                return SEARCH
+            if command == 'TURN':
+                x, y = _parse_numbers(argument, 2)
+                if not self.board.is_valid_move(y, x):
+                    return [f"ERROR invalid move {x},{y}"]
+                self.board.place(y, x, self.to_move())
+                return SEARCH
+            if command == 'BOARD':
+                self.pending_stones = []
+                return []
+            if command == 'TAKEBACK':
+                x, y = _parse_numbers(argument, 2)
+                moves = [move for move in board_stones(self.board) if move[:2] != (y, x)]
+                self.board = board_from_stones(self.shape(), moves)
+                return ['OK']
+        except ValueError:
+            return [f"ERROR bad arguments for {command}: {argument}"]
+        return [f"UNKNOWN {command}"]
+
+    def _start(self, width, height):
+        if min(width, height) < WIN_LENGTH:
+            return [f"ERROR a {width}x{height} board cannot fit {WIN_LENGTH} in a row"]
+        self.board = Board(height, width, WIN_LENGTH, self.rule)
+        return ['OK']
+
+    def _info(self, key, value):
+        key = key.lower()
+        try:
+            number = int(value)
+        except ValueError:
+            return  # Keys such as folder carry text we do not need
+        if key == 'timeout_turn':
+            self.timeout_turn = number
+        elif key == 'time_left':
+            self.time_left = number
+        elif key == 'rule':
+            self.rule = RENJU if number & RULE_RENJU else EXACT_FIVE if number & RULE_EXACT else FREESTYLE
+            if self.board is not None:
+                self.board = board_from_stones(self.shape(), board_stones(self.board))
+
+    # One "x,y,field" line of a BOARD command (spaces around the fields are allowed), or DONE
+    def _board_line(self, line):
+        text = line.strip()
+        if text.upper() == 'DONE':
+            stones, self.pending_stones = self.pending_stones, None
+            own = sum(field == 1 for _, _, field in stones)
+            # Whoever moved first has as many stones as the other side or one more
+            me = PLAYER if own * 2 == sum(field in (1, 2) for _, _, field in stones) else AI
+            self.board.reset()
+            for x, y, field in stones:
+                if field in (1, 2) and self.board.is_valid_move(y, x):
+                    self.board.place(y, x, me if field == 1 else opponent_of(me))
+            return SEARCH
+        try:
+            self.pending_stones.append(tuple(_parse_numbers(text, 3)))
+        except ValueError:
+            return [f"ERROR bad BOARD line: {text}"]
+        return []
+
+    def shape(self):
+        return self.board.rows, self.board.cols, self.board.win_length, self.rule
+
+    # Black (PLAYER) moves first, so the colour to move follows from the stone count
+    def to_move(self):
+        return PLAYER if len(self.board.history) % 2 == 0 else AI
+
+    # Seconds for the next move under the session's time controls
+    def move_seconds(self):
+        seconds = self.timeout_turn / 1000 - TIME_MARGIN
+        if self.time_left is not None:
+            seconds = min(seconds, self.time_left / 1000 / MOVES_TO_GO)
+        return max(MIN_MOVE_SECONDS, seconds)
+
+    def search_request(self):
+        return (self.spec, self.shape(), board_stones(self.board), self.to_move(),
+                time.time() + self.move_seconds())
+
+    def play(self, row, col):
+        self.board.place(row, col, self.to_move())
+        return f"{col},{row}"
+
+
+# Runs one session until END or end of input. read_line() returns a line or None;
+# write_line(text) sends one answer line.
+async def run_session(session, read_line, write_line, pool):
+    loop = asyncio.get_running_loop()
+    while not session.ended:
+        line = await read_line()
+        if line is None:
+            break
+        answer = session.handle(line)
+        if answer == SEARCH:
+            if session.board.is_full():
+                answer = ["ERROR the board is full"]
+            else:
+                row, col = await loop.run_in_executor(pool, search_move, *session.search_request())
+                answer = [session.play(row, col)]
+        for text in answer:
+            await write_line(text)
+
+
+async def serve_stdio(spec=DEFAULT_ENGINE, workers=1):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    async def read_line():
+        data = await reader.readline()
+        return data.decode() if data else None
+
+    async def write_line(text):
+        sys.stdout.write(text + '\n')
+        sys.stdout.flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        await run_session(Session(spec), read_line, write_line, pool)
+
+
+# Serves one session per connection until cancelled. on_ready is called with the port once
+# the socket listens (useful with port 0, which picks a free port).
+async def serve_socket(host='127.0.0.1', port=0, spec=DEFAULT_ENGINE, workers=None, on_ready=None):
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        async def handle_client(reader, writer):
+            async def read_line():
+                data = await reader.readline()
+                return data.decode() if data else None
+
+            async def write_line(text):
+                writer.write((text + '\n').encode())
+                await writer.drain()
+
+            try:
+                await run_session(Session(spec), read_line, write_line, pool)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle_client, host, port)
+        bound_port = server.sockets[0].getsockname()[1]
+        print(f"Listening on {host}:{bound_port}", file=sys.stderr)
+        if on_ready is not None:
+            on_ready(bound_port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gomocup-style protocol server for the Gomoku engine")
+    parser.add_argument('--engine', default=DEFAULT_ENGINE, help="engine spec, e.g. id:threats=1 or alphabeta:depth=3")
+    parser.add_argument('--port', type=int, default=None, help="serve sessions on this local port instead of stdin")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--workers', type=int, default=None, help="search processes (default: 1 for stdin, all CPUs)")
+    args = parser.parse_args(argv)
+    Engine(args.engine)  # Fail fast on a bad spec
+    try:
+        if args.port is None:
+            asyncio.run(serve_stdio(args.engine, args.workers or 1))
+        else:
+            asyncio.run(serve_socket(args.host, args.port, args.engine, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+from .board import AI, COLS, EMPTY, FREESTYLE, PLAYER, ROWS, Board
+from .lines import WIN_LENGTH
+from .search import MAX_DEPTH, iterative_deepening
+from .transposition import DEFAULT_TABLE_BYTES, TranspositionTable
+
+# Game record format: one game per line, appended as games finish, e.g.
+#     15x15 5 freestyle black h8 i9 h9 h10 h7 h6 h5
+# board size, win length, rule, result (black, white, draw or * when unfinished), then the
+# moves in order starting with black (PLAYER). A move is its column letter followed by its
+# row number, both counted from the top left corner (a1); columns after z go on as aa, ab,
+# ... Blank lines and lines starting with '#' are ignored, so files can be concatenated and
+# annotated freely.
+RESULTS = ('black', 'white', 'draw', '*')
+PENDING_PER_WORKER = 2  # Games queued per analysis worker
+COLUMN_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+# Column letters as on a spreadsheet: a .. z, then aa .. az, ba ..
+def column_name(col):
+    name = ''
+    col += 1
+    while col:
+        col, letter = divmod(col - 1, len(COLUMN_LETTERS))
+        name = COLUMN_LETTERS[letter] + name
+    return name
+
+
+def move_to_text(row, col):
+    return f"{column_name(col)}{row + 1}"
+
+
+def text_to_move(text):
+    letters = text.rstrip('0123456789')
+    number = text[len(letters):]
+    if not letters or not number or any(letter not in COLUMN_LETTERS for letter in letters):
+        raise ValueError(f"Bad move '{text}', expected column letters and a row number such as h8")
+    col = 0
+    for letter in letters:
+        col = col * len(COLUMN_LETTERS) + COLUMN_LETTERS.index(letter) + 1
+    return int(number) - 1, col - 1
+
+
+# Result of the game on `board` so far, in RESULTS terms
+def board_result(board):
+    if board.history and board.last_move_wins():
+        return 'black' if board.last_player() == PLAYER else 'white'
+    if board.is_full():
+        return 'draw'
+    return '*'
+
+
+class GameRecord:
+    def __init__(self, moves, result='*', rows=ROWS, cols=COLS, win_length=WIN_LENGTH, rule=FREESTYLE):
+        if result not in RESULTS:
+            raise ValueError(f"Unknown result '{result}', expected one of {', '.join(RESULTS)}")
+        self.moves = [tuple(move) for move in moves]
+        self.result = result
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.rule = rule
+
+    @classmethod
+    def from_board(cls, board):
+        return cls(board.history, board_result(board), board.rows, board.cols, board.win_length, board.rule)
+
+    @classmethod
+    def from_line(cls, line):
+        fields = line.split()
+        if len(fields) < 4 or 'x' not in fields[0]:
+            raise ValueError(f"Bad game record: {line.strip()!r}")
+        rows, _, cols = fields[0].partition('x')
+        return cls([text_to_move(move) for move in fields[4:]], fields[3], int(rows), int(cols),
+                   int(fields[1]), fields[2])
+
+    def to_line(self):
+        header = f"{self.rows}x{self.cols} {self.win_length} {self.rule} {self.result}"
+        return ' '.join([header] + [move_to_text(row, col) for row, col in self.moves])
+
+    def new_board(self):
+        return Board(self.rows, self.cols, self.win_length, self.rule)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"GameRecord({self.to_line()!r})"
+
+
+# Yields the GameRecords of a record file one at a time, so files of any size can be read
+def read_records(path):
+    with open(path) as record_file:
+        for line in record_file:
+            if line.strip() and not line.startswith('#'):
+                yield GameRecord.from_line(line)
+
+
+# Appends finished games to a record file, one line each, flushed as they are written
+class RecordWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def write(self, record):
+        self.file.write(record.to_line() + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Moves one board through a recorded game with place/undo only, never copying it.
+# `board` may be passed in when it already holds the first moves of the record (the GUI
+# replays its own board this way to take moves back).
+class Replay:
+    def __init__(self, record, board=None):
+        self.record = record
+        self.board = board if board is not None else record.new_board()
+
+    def ply(self):
+        return len(self.board.history)
+
+    # Colour of the stone played at ply `ply` (0-based)
+    @staticmethod
+    def player_at(ply):
+        return PLAYER if ply % 2 == 0 else AI
+
+    def forward(self):
+        ply = self.ply()
+        if ply >= len(self.record.moves):
+            return False
+        row, col = self.record.moves[ply]
+        self.board.place(row, col, self.player_at(ply))
+        return True
+
+    def back(self):
+        if not self.board.history:
+            return False
+        self.board.undo()
+        return True
+
+    def seek(self, ply):
+        ply = max(0, min(ply, len(self.record.moves)))
+        while self.ply() > ply:
+            self.board.undo()
+        while self.ply() < ply:
+            self.forward()
+        return self.board
+
+    # Yields (ply, board, player to move, move played there) for every position before a
+    # recorded move. The board is shared and changes as iteration goes on.
+    def positions(self, start=0):
+        self.seek(start)
+        while self.ply() < len(self.record.moves):
+            ply = self.ply()
+            yield ply, self.board, self.player_at(ply), self.record.moves[ply]
+            self.forward()
+
+
+# Per-process state of pool workers: each keeps its own transposition table between games
+_worker_tt = None
+
+
+def _init_worker(tt_bytes):
+    global _worker_tt
+    _worker_tt = TranspositionTable(tt_bytes)
+
+
+# Searches every position of one game (sent as its record line) for the side to move and
+# compares the engine's choice with the move that was played
+def analyze_game(game_id, line, depth=4, time_limit=None):
+    record = GameRecord.from_line(line)
+    tt = _worker_tt if _worker_tt is not None else TranspositionTable()
+    plies = []
+    agreed = nodes = 0
+    start = time.perf_counter()
+    for ply, board, player, played in Replay(record).positions():
+        result = iterative_deepening(board, player, max_depth=depth, time_limit=time_limit, tt=tt)
+        best = (result.row, result.col)
+        agreed += best == played
+        nodes += result.nodes
+        plies.append({
+            'ply': ply,
+            'player': 'black' if player == PLAYER else 'white',
+            'played': move_to_text(*played),
+            'best': move_to_text(*best),
+            'score': result.score,
+            'depth': result.depth,
+        })
+    return {
+        'game': game_id,
+        'result': record.result,
+        'plies': plies,
+        'agreement': agreed / len(plies) if plies else 0.0,
+        'nodes': nodes,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+
+
+# Re-searches every position of every game in `records` on a process pool, one game per
+# task. Games are read from `records` only as workers free up (at most PENDING_PER_WORKER
+# queued per worker), so a record file is never loaded whole. Each finished analysis is
+# written to `output` (a file object) as one JSON line; returns the analyses in game order.
+def analyze_records(records, depth=4, time_limit=None, workers=None, output=None, tt_bytes=DEFAULT_TABLE_BYTES):
+    workers = workers or os.cpu_count() or 1
+    analyses = []
+
+    def collect(futures):
+        for future in futures:
+            analysis = future.result()
+            analyses.append(analysis)
+            if output is not None:
+                output.write(json.dumps(analysis) + '\n')
+                output.flush()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tt_bytes,)) as pool:
+        pending = set()
+        for game_id, record in enumerate(records):
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(analyze_game, game_id, record.to_line(), depth, time_limit))
+        collect(as_completed(pending))
+    analyses.sort(key=lambda analysis: analysis['game'])
+    return analyses
+
+
+def board_text(board):
+    marks = {EMPTY: '.', PLAYER: 'x', AI: 'o'}
+    width = len(column_name(board.cols - 1))
+    lines = ['   ' + ' '.join(column_name(col).ljust(width) for col in range(board.cols))]
+    for row in range(board.rows):
+        lines.append(f"{row + 1:2d} " + ' '.join(marks[board[row][col]].ljust(width) for col in range(board.cols)))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay or analyze Gomoku game records")
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help="print a position from a record file")
+    show.add_argument('records')
+    show.add_argument('--game', type=int, default=0, help="game number in the file, from 0")
+    show.add_argument('--ply', type=int, default=None, help="moves to replay (default: the whole game)")
+    analyze = commands.add_parser('analyze', help="re-search every position of every game")
+    analyze.add_argument('records')
+    analyze.add_argument('--depth', type=int, default=4)
+    analyze.add_argument('--time', type=float, default=None, help="seconds per position")
+    analyze.add_argument('--workers', type=int, default=None)
+    analyze.add_argument('--output', default=None, help="JSONL file for per-game analyses ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        for game_id, record in enumerate(read_records(args.records)):
+            if game_id == args.game:
+                replay = Replay(record)
+                board = replay.seek(len(record) if args.ply is None else args.ply)
+                print(f"Game {game_id}: {record.result}, ply {replay.ply()} of {len(record)}")
+                print(board_text(board))
+                return record
+        parser.error(f"{args.records} has no game {args.game}")
+
+    if args.output == '-':
+        output = sys.stdout
+    elif args.output:
+        output = open(args.output, 'w')
+    else:
+        output = None
+    max_depth = args.depth if args.time is None else MAX_DEPTH
+    try:
+        analyses = analyze_records(read_records(args.records), max_depth, args.time, args.workers, output)
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+    positions = sum(len(analysis['plies']) for analysis in analyses)
+    agreed = sum(analysis['agreement'] * len(analysis['plies']) for analysis in analyses)
+    print(f"{len(analyses)} games, {positions} positions, engine agreed with {agreed / max(positions, 1):.1%} "
+          f"of the moves played", file=sys.stderr)
+    return analyses
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+import math
+import random
+import time
+
+from .board import get_valid_moves, opponent_of
+from .evaluation import evaluate_board
+from .lines import line_weights
+from .ordering import MoveOrderer, move_gain
+from .stats import SearchStats
+from .threats import win_points
+from .transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+WIN_SCORE = 100000
+MAX_DEPTH = 20
+CHECK_EVERY = 256  # Nodes between clock checks
+ASPIRATION_WINDOW = 3000  # Half-width of the first window around the previous iteration's score
+ASPIRATION_MAX = 20000  # Windows wider than this fall back to a full-width search
+LMR_MIN_DEPTH = 3  # Late-move reductions only apply this far from the leaves
+LMR_FULL_MOVES = 4  # Moves searched at full depth before reductions start
+
+
+class SearchAborted(Exception):
+    pass
+
+
+# Wall-clock / node budget for one search. tick() is called once per node and
+# raises SearchAborted when the budget is spent or when stop_event (a threading.Event,
+# set from another thread to cancel the search) is set. Optionally carries SearchStats.
+class SearchControl:
+    def __init__(self, time_limit=None, max_nodes=None, stats=None, stop_event=None):
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.max_nodes = max_nodes
+        self.stats = stats
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.next_check = CHECK_EVERY
+
+    def tick(self):
+        self.nodes += 1
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted()
+        if self.nodes >= self.next_check:
+            self.next_check += CHECK_EVERY
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchAborted()
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted()
+
+
+class SearchResult:
+    def __init__(self, row, col, score, depth, nodes, elapsed, pv, stats=None):
+        self.row = row
+        self.col = col
+        self.score = score
+        self.depth = depth  # Deepest completed iteration
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv  # Principal variation as (row, col) moves
+        self.stats = stats  # SearchStats when collected
+
+    def __repr__(self):
+        return (f"SearchResult(move=({self.row}, {self.col}), score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.3f})")
+
+
+# Puts the transposition table's best move (if any) in front of the others
+def _order_moves(board, moves, tt_move):
+    if tt_move != NO_MOVE:
+        move = board.cell_moves[tt_move]
+        if move in moves:
+            moves.remove(move)
+            moves.insert(0, move)
+    return moves
+
+
+# Score of a finished game or a depth-0 leaf from `player`'s point of view, else None
+def _terminal_score(board, depth, player, stats):
+    if stats is not None and stats.timing:
+        won = stats.timed('win_check_time', board.last_move_wins)
+    else:
+        won = board.last_move_wins()
+    if won:
+        return WIN_SCORE if board.last_player() == player else -WIN_SCORE
+    if depth == 0 or board.is_full():
+        if stats is None:
+            return evaluate_board(board, player)
+        stats.leaves += 1
+        if stats.timing:
+            return stats.timed('eval_time', evaluate_board, board, player)
+        return evaluate_board(board, player)
+    return None
+
+
+def _generate_moves(board, to_move, tt_move, orderer, stats):
+    if stats is not None:
+        stats.interior += 1
+        if stats.timing:
+            return stats.timed('movegen_time', _generate_moves, board, to_move, tt_move, orderer, None)
+    if orderer is not None:
+        return orderer.order(board, to_move, tt_move)
+    return _order_moves(board, get_valid_moves(board, to_move), tt_move)
+
+
+# Scores are always from the point of view of `player`, who moves at maximizing nodes.
+# An optional TranspositionTable caches exact results across transpositions, and an
+# optional MoveOrderer with a beam width limits each node to its best candidates.
+# A SearchControl adds a time/node budget and, through its stats, instrumentation.
+# alphabeta also takes a vectorized BatchEvaluator to score all leaves below a depth-1 node
+# in one call instead of playing them out one by one.
+def minimax(board, depth, player, maximizingPlayer=True, tt=None, orderer=None, control=None):
+    stats = None
+    if control is not None:
+        control.tick()
+        stats = control.stats
+    opponent = opponent_of(player)
+    terminal = _terminal_score(board, depth, player, stats)
+    if terminal is not None:
+        return None, None, terminal
+
+    to_move = player if maximizingPlayer else opponent
+    sign = 1 if maximizingPlayer else -1
+    if tt is not None:
+        key = board.key(to_move)
+        entry = tt.probe(key)
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None and entry[0] >= depth and entry[1] == EXACT and entry[3] != NO_MOVE:
+            return *board.cell_moves[entry[3]], sign * entry[2]
+
+    valid_moves = _generate_moves(board, to_move, NO_MOVE, orderer, stats)
+    best_move = None
+
+    if maximizingPlayer:
+        max_utility = -math.inf
+        for move in valid_moves:
+            row, col = move
+            board.place(row, col, player)
+            _, _, utility = minimax(board, depth - 1, player, False, tt, orderer, control)
+            board.undo()
+            if utility > max_utility:
+                max_utility = utility
+                best_move = move
+        best_utility = max_utility
+    else:
+        min_utility = math.inf
+        for move in valid_moves:
+            row, col = move
+            board.place(row, col, opponent)
+            _, _, utility = minimax(board, depth - 1, player, True, tt, orderer, control)
+            board.undo()
+            if utility < min_utility:
+                min_utility = utility
+                best_move = move
+        best_utility = min_utility
+
+    if tt is not None:
+        tt.store(key, depth, EXACT, sign * best_utility, best_move[0] * board.stride + best_move[1])
+    return *best_move, best_utility
+
+
+def alphabeta(board, depth, alpha, beta, player, maximizingPlayer=True, tt=None, control=None, orderer=None,
+              batch=None, deterministic=False):
+    if batch is not None and board.patterns is not None:
+        # The batch evaluator scores leaves with line weights, which would mix with pattern scores
+        raise ValueError("patterns and batch cannot be combined")
+    stats = None
+    if control is not None:
+        control.tick()
+        stats = control.stats
+    opponent = opponent_of(player)
+    terminal = _terminal_score(board, depth, player, stats)
+    if terminal is not None:
+        return None, None, terminal
+
+    to_move = player if maximizingPlayer else opponent
+    sign = 1 if maximizingPlayer else -1
+    tt_move = NO_MOVE
+    original_alpha, original_beta = alpha, beta
+    if tt is not None:
+        key = board.key(to_move)
+        entry = tt.probe(key)
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None:
+            entry_depth, flag, value, tt_move = entry
+            if entry_depth >= depth and tt_move != NO_MOVE:
+                value *= sign
+                # Bounds are stored for the side to move, so they swap at minimizing nodes
+                if flag == EXACT:
+                    return *board.cell_moves[tt_move], value
+                if (flag == LOWER) == maximizingPlayer:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return *board.cell_moves[tt_move], value
+
+    valid_moves = _generate_moves(board, to_move, tt_move, orderer, stats)
+    best_moves = []
+    leaf_scores = None
+    if batch is not None and depth == 1:
+        leaf_scores = batch.evaluate_children(board, valid_moves, to_move, player)
+        if control is not None:
+            control.nodes += len(valid_moves)
+        if stats is not None:
+            stats.leaves += len(valid_moves)
+
+    if maximizingPlayer:
+        max_utility = -math.inf
+        for number, move in enumerate(valid_moves):
+            row, col = move
+            if leaf_scores is not None:
+                utility = leaf_scores[number]
+            else:
+                board.place(row, col, player)
+                _, _, utility = alphabeta(board, depth - 1, alpha, beta, player, False, tt, control, orderer,
+                                          batch, deterministic)
+                board.undo()
+            if utility > max_utility:
+                max_utility = utility
+                best_moves = [move]
+            elif utility == max_utility:
+                best_moves.append(move)
+            alpha = max(alpha, utility)
+            if beta <= alpha:
+                if orderer is not None:
+                    orderer.cutoff(board, to_move, row, col, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    stats.first_move_cutoffs += number == 0
+                break
+        best_utility = max_utility
+    else:
+        min_utility = math.inf
+        for number, move in enumerate(valid_moves):
+            row, col = move
+            if leaf_scores is not None:
+                utility = leaf_scores[number]
+            else:
+                board.place(row, col, opponent)
+                _, _, utility = alphabeta(board, depth - 1, alpha, beta, player, True, tt, control, orderer,
+                                          batch, deterministic)
+                board.undo()
+            if utility < min_utility:
+                min_utility = utility
+                best_moves = [move]
+            elif utility == min_utility:
+                best_moves.append(move)
+            beta = min(beta, utility)
+            if beta <= alpha:
+                if orderer is not None:
+                    orderer.cutoff(board, to_move, row, col, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    stats.first_move_cutoffs += number == 0
+                break
+        best_utility = min_utility
+
+    # Ties go to a random move unless play must be reproducible
+    best_move = best_moves[0] if deterministic else random.choice(best_moves)
+    if tt is not None:
+        if best_utility <= original_alpha:
+            flag = UPPER if maximizingPlayer else LOWER
+        elif best_utility >= original_beta:
+            flag = LOWER if maximizingPlayer else UPPER
+        else:
+            flag = EXACT
+        tt.store(key, depth, flag, sign * best_utility, best_move[0] * board.stride + best_move[1])
+    return *best_move, best_utility
+
+
+# Principal variation search in negamax form: `player` is the side to move and scores are
+# from its point of view. The first (best-ordered) move gets the full window, later ones a
+# null window that only proves they are no better, and are searched again when they are.
+# Quiet late moves (small move_gain) are first searched one ply shallower (late-move
+# reduction). Ties keep the first move found, so results are reproducible.
+def pvs(board, depth, alpha, beta, player, tt=None, control=None, orderer=None):
+    stats = None
+    if control is not None:
+        control.tick()
+        stats = control.stats
+    terminal = _terminal_score(board, depth, player, stats)
+    if terminal is not None:
+        return None, None, terminal
+
+    tt_move = NO_MOVE
+    original_alpha = alpha
+    if tt is not None:
+        key = board.key(player)
+        entry = tt.probe(key)
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None:
+            entry_depth, flag, value, tt_move = entry
+            if entry_depth >= depth and tt_move != NO_MOVE:
+                if flag == EXACT:
+                    return *board.cell_moves[tt_move], value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return *board.cell_moves[tt_move], value
+
+    moves = _generate_moves(board, player, tt_move, orderer, stats)
+    opponent = opponent_of(player)
+    quiet_gain = line_weights(board.win_length)[board.win_length - 2] // 2  # Less than making or blocking a three
+    best_move = None
+    best_score = -math.inf
+    for number, move in enumerate(moves):
+        row, col = move
+        reduce = (depth >= LMR_MIN_DEPTH and number >= LMR_FULL_MOVES and
+                  move_gain(board, row * board.stride + col, player) < quiet_gain)
+        board.place(row, col, player)
+        if number == 0:
+            score = -pvs(board, depth - 1, -beta, -alpha, opponent, tt, control, orderer)[2]
+        else:
+            if reduce:
+                if stats is not None:
+                    stats.reductions += 1
+                score = -pvs(board, depth - 2, -alpha - 1, -alpha, opponent, tt, control, orderer)[2]
+            if not reduce or score > alpha:
+                score = -pvs(board, depth - 1, -alpha - 1, -alpha, opponent, tt, control, orderer)[2]
+            if alpha < score < beta:
+                if stats is not None:
+                    stats.researches += 1
+                score = -pvs(board, depth - 1, -beta, -alpha, opponent, tt, control, orderer)[2]
+        board.undo()
+        if score > best_score:
+            best_score = score
+            best_move = move
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            if orderer is not None:
+                orderer.cutoff(board, player, row, col, depth)
+            if stats is not None:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += number == 0
+            break
+
+    if tt is not None:
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(key, depth, flag, best_score, best_move[0] * board.stride + best_move[1])
+    return *best_move, best_score
+
+
+# Root PVS inside a window around `guess` (the previous iteration's score) that widens
+# on the side the score falls outside of until the score lands inside it
+def _aspiration_search(board, depth, player, guess, tt, control, orderer):
+    if guess is None or abs(guess) >= WIN_SCORE:
+        return pvs(board, depth, -math.inf, math.inf, player, tt, control, orderer)
+    delta = ASPIRATION_WINDOW
+    alpha, beta = guess - delta, guess + delta
+    while True:
+        row, col, score = pvs(board, depth, alpha, beta, player, tt, control, orderer)
+        if alpha < score < beta or (alpha == -math.inf and beta == math.inf):
+            return row, col, score
+        if control is not None and control.stats is not None:
+            control.stats.aspiration_fails += 1
+        delta *= 4
+        if delta > ASPIRATION_MAX:
+            alpha, beta = -math.inf, math.inf
+        elif score <= alpha:
+            alpha = score - delta
+        else:
+            beta = score + delta
+
+
+# Follows best moves stored in the table from the current position
+def principal_variation(board, player, tt, max_length=MAX_DEPTH):
+    pv = []
+    to_move = player
+    while len(pv) < max_length and not board.last_move_wins():
+        entry = tt.probe(board.key(to_move))
+        if entry is None or entry[3] == NO_MOVE:
+            break
+        row, col = board.cell_moves[entry[3]]
+        if not board.is_valid_move(row, col):
+            break
+        board.place(row, col, to_move)
+        pv.append((row, col))
+        to_move = opponent_of(to_move)
+    for _ in pv:
+        board.undo()
+    return pv
+
+
+# Runs alphabeta at depth 1, 2, ... until the time or node budget runs out and returns
+# the result of the deepest iteration that finished. Each iteration searches the previous
+# principal variation first through the shared transposition table, and the rest of the
+# moves in MoveOrderer order. With a ThreatSolver, forced VCF/VCT wins are tried first.
+# Per-move SearchStats are gathered when on_stats is given (it is called with them) or
+# collect_stats is set; timing=True also splits time into win checks, evaluation and
+# move generation. Setting stop_event cancels the search and returns the best result so far.
+# With an OpeningBook, a position found in the book is answered without searching (depth 0).
+# A BatchEvaluator is passed on to alphabeta. use_pvs searches each iteration with pvs inside
+# an aspiration window around the previous score; deterministic makes alphabeta break ties
+# by move order instead of at random (pvs always does). On a full board the result has no
+# move (row and col are None).
+def iterative_deepening(board, player, max_depth=MAX_DEPTH, time_limit=None, max_nodes=None, tt=None,
+                        beam_width=None, orderer=None, threat_solver=None, on_stats=None,
+                        collect_stats=False, timing=False, stop_event=None, book=None, batch=None,
+                        use_pvs=False, deterministic=False):
+    start = time.perf_counter()
+    stats = SearchStats(timing) if on_stats is not None or collect_stats or timing else None
+    if board.is_full():
+        # Nothing to play: no move, like the (None, None, score) of minimax and alphabeta
+        best = SearchResult(None, None, evaluate_board(board, player), 0, 0, time.perf_counter() - start, [], stats)
+        return _finish(best, stats, on_stats)
+    if book is not None:
+        found = book.lookup(board, player)
+        if found is not None:
+            row, col, score = found
+            best = SearchResult(row, col, score, 0, 0, time.perf_counter() - start, [(row, col)], stats)
+            return _finish(best, stats, on_stats)
+    control = SearchControl(time_limit, max_nodes, stats, stop_event)
+    if threat_solver is not None:
+        line = (threat_solver.solve_vcf(board, player, control=control) or
+                threat_solver.solve_vct(board, player, control=control))
+        if stats is not None:
+            stats.threat_nodes = threat_solver.nodes
+        if line:
+            best = SearchResult(*line[0], WIN_SCORE, len(line), threat_solver.nodes,
+                                time.perf_counter() - start, line, stats)
+            return _finish(best, stats, on_stats)
+
+    if tt is None:
+        tt = TranspositionTable()
+    if orderer is None:
+        orderer = MoveOrderer(beam_width)
+    tt.new_search()
+    orderer.new_search()
+    start_moves = len(board.history)
+    moves = get_valid_moves(board, player)
+    # Until depth 1 completes, fall back on the move ordering's favourite
+    first = orderer.order(board, player)[0]
+    best = SearchResult(*first, 0, 0, 0, 0.0, [first], stats)
+
+    for depth in range(1, max_depth + 1):
+        try:
+            if use_pvs:
+                row, col, score = _aspiration_search(board, depth, player, best.score if depth > 1 else None,
+                                                     tt, control, orderer)
+            else:
+                row, col, score = alphabeta(board, depth, -math.inf, math.inf, player, True, tt, control,
+                                            orderer, batch, deterministic)
+        except SearchAborted:
+            # Unwind the moves the interrupted search left on the board
+            while len(board.history) > start_moves:
+                board.undo()
+            break
+        pv = principal_variation(board, player, tt, depth) or [(row, col)]
+        best = SearchResult(row, col, score, depth, control.nodes, time.perf_counter() - start, pv, stats)
+        if stats is not None:
+            stats.iterations.append((depth, control.nodes, best.elapsed))
+        if abs(score) >= WIN_SCORE or len(moves) == 1:
+            break
+
+    best.nodes = control.nodes
+    best.elapsed = time.perf_counter() - start
+    return _finish(best, stats, on_stats)
+
+
+def _finish(result, stats, on_stats):
+    if stats is not None:
+        stats.nodes += result.nodes
+        stats.depth = result.depth
+        stats.elapsed = result.elapsed
+        if on_stats is not None:
+            on_stats(stats)
+    return result
+
+
+def find_winning_move(board, player):
+    wins = win_points(board, player)
+    return board.cell_moves[wins[0]] if wins else None
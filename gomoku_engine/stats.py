@@ -0,0 +1,77 @@
+import time
+
+
+# Counters for one search. Only created when someone asks for them (a stats callback
+# or collect_stats=True), so plain searches pay nothing beyond a None check; the
+# per-phase timers are a further opt-in because they call the clock several times per node.
+class SearchStats:
+    def __init__(self, timing=False):
+        self.timing = timing
+        self.nodes = 0
+        self.leaves = 0  # Positions scored by evaluate_board
+        self.interior = 0  # Positions whose moves were generated and searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.threat_nodes = 0
+        self.researches = 0  # PVS null-window probes that failed high and were searched again
+        self.reductions = 0  # Late moves searched one ply shallower
+        self.aspiration_fails = 0  # Iterations whose aspiration window had to be widened
+        self.depth = 0
+        self.elapsed = 0.0
+        self.win_check_time = 0.0
+        self.eval_time = 0.0
+        self.movegen_time = 0.0
+        self.iterations = []  # (depth, nodes, seconds) per completed iteration
+
+    # Runs function(*args) and adds its duration to the named timer
+    def timed(self, field, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        setattr(self, field, getattr(self, field) + time.perf_counter() - start)
+        return result
+
+    def cutoff_rate(self):
+        return self.cutoffs / self.interior if self.interior else 0.0
+
+    def first_move_cutoff_ratio(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'leaves': self.leaves,
+            'interior': self.interior,
+            'nps': round(self.nodes_per_second()),
+            'cutoff_rate': round(self.cutoff_rate(), 4),
+            'first_move_cutoff_ratio': round(self.first_move_cutoff_ratio(), 4),
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'threat_nodes': self.threat_nodes,
+            'researches': self.researches,
+            'reductions': self.reductions,
+            'aspiration_fails': self.aspiration_fails,
+            'depth': self.depth,
+            'elapsed': round(self.elapsed, 6),
+            'win_check_time': round(self.win_check_time, 6),
+            'eval_time': round(self.eval_time, 6),
+            'movegen_time': round(self.movegen_time, 6),
+            'iterations': [[depth, nodes, round(seconds, 6)] for depth, nodes, seconds in self.iterations],
+        }
+
+
+# Ready-made stats callback that writes one line per move to the 'gomoku_engine.search' logger
+# (logging is only imported once it is used)
+def log_stats(stats):
+    import logging
+    logger = logging.getLogger('gomoku_engine.search')
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("depth=%d nodes=%d nps=%.0f leaves=%d cutoff_rate=%.3f first_move_cutoffs=%.3f "
+                    "tt_hits=%d/%d win_check=%.4fs eval=%.4fs movegen=%.4fs",
+                    stats.depth, stats.nodes, stats.nodes_per_second(), stats.leaves, stats.cutoff_rate(),
+                    stats.first_move_cutoff_ratio(), stats.tt_hits, stats.tt_probes,
+                    stats.win_check_time, stats.eval_time, stats.movegen_time)
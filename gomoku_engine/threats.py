@@ -0,0 +1,228 @@
+import time
+
+from .board import FREESTYLE, opponent_of
+from .ordering import move_gain
+
+DEFAULT_VCF_DEPTH = 12  # Attacker moves in a victory by continuous fours
+DEFAULT_VCT_DEPTH = 4  # Attacker moves in a victory by threes and fours
+DEFAULT_MAX_NODES = 5000
+MAX_CACHE_ENTRIES = 200000
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+# Empty cells of the windows where `player` has `count` stones and the opponent none,
+# in board order
+def threat_cells(board, player, count):
+    target = count * board.state_step[player]
+    occupied = board.occupied()
+    windows = board.windows
+    state = board.window_state
+    cells = set()
+    window = state.index(target) if target in state else -1
+    while window >= 0:
+        for index in windows[window]:
+            if not occupied >> index & 1:
+                cells.add(index)
+        try:
+            window = state.index(target, window + 1)
+        except ValueError:
+            break
+    return sorted(cells)
+
+
+# Cells where `player` would win (complete win_length in a row, without an overline
+# where the rule forbids it)
+def win_points(board, player):
+    cells = threat_cells(board, player, board.win_length - 1)
+    if board.rule != FREESTYLE:
+        cells = [index for index in cells if board.is_win_at(*board.cell_moves[index], player)]
+    return cells
+
+
+# True if a Renju-style rule keeps `player` from playing at `index`
+def _forbidden(board, index, player):
+    return board.is_forbidden(*board.cell_moves[index], player)
+
+
+# Line for a four the defender cannot stop (an open four, a double four or a block the
+# rule forbids): the defender's block, then the winning move, so the line alternates sides
+def _unstoppable(board, move, replies, defender):
+    blocks = [index for index in replies if not _forbidden(board, index, defender)]
+    if blocks:
+        block = blocks[0]
+        win = [index for index in replies if index != block][0]
+    else:
+        # The only block is forbidden, so any other move loses to the same five
+        win = replies[0]
+        others = [index for index in sorted(board.candidates) if not _forbidden(board, index, defender)]
+        if not others:
+            return [move, win]
+        block = others[0]
+    return [move, block, win]
+
+
+# Searches forcing sequences only: victory by continuous fours (VCF), where every
+# attacking move threatens five, and victory by continuous threats (VCT), which also
+# allows threes that would win by VCF if left alone. Results are cached by position
+# and the search gives up (returns None) once max_nodes is reached, or when the deadline
+# or stop_event of the caller's SearchControl comes first.
+class ThreatSolver:
+    def __init__(self, max_nodes=DEFAULT_MAX_NODES, vcf_depth=DEFAULT_VCF_DEPTH, vct_depth=DEFAULT_VCT_DEPTH):
+        self.max_nodes = max_nodes
+        self.vcf_depth = vcf_depth
+        self.vct_depth = vct_depth
+        self.cache = {}
+        self.nodes = 0
+        self.stop_event = None
+        self.deadline = None
+
+    # Winning line for `player` (to move) starting with a four, as (row, col) moves, or None.
+    # Setting stop_event (a threading.Event) gives up the search early; a search.SearchControl
+    # passed as control adds its deadline (time.perf_counter() based) and stop_event.
+    def solve_vcf(self, board, player, stop_event=None, control=None):
+        return self._solve(board, player, self._vcf, self.vcf_depth, stop_event, control)
+
+    # Winning line for `player` (to move) using fours and threes, or None
+    def solve_vct(self, board, player, stop_event=None, control=None):
+        return self._solve(board, player, self._vct, self.vct_depth, stop_event, control)
+
+    def _solve(self, board, player, search, depth, stop_event, control):
+        self.nodes = 0
+        self.stop_event = stop_event
+        self.deadline = None
+        if control is not None:
+            self.stop_event = stop_event or control.stop_event
+            self.deadline = control.deadline
+        if len(self.cache) > MAX_CACHE_ENTRIES:
+            self.cache.clear()
+        start_moves = len(board.history)
+        try:
+            line = search(board, player, opponent_of(player), depth)
+        except _BudgetExceeded:
+            while len(board.history) > start_moves:
+                board.undo()
+            return None
+        if line is None:
+            return None
+        return [board.cell_moves[index] for index in line]
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.stop_event is not None and self.stop_event.is_set()):
+            raise _BudgetExceeded()
+        # Threat nodes are slow enough to read the clock at every one
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise _BudgetExceeded()
+
+    def _place(self, board, index, player):
+        board.make(index, player)
+
+    def _vcf(self, board, attacker, defender, depth):
+        self._tick()
+        wins = win_points(board, attacker)
+        if wins:
+            return [wins[0]]
+        if depth == 0:
+            return None
+        key = ('vcf', board.key(attacker))
+        cached = self.cache.get(key)
+        if cached is not None and (cached[1] is not None or cached[0] >= depth):
+            return cached[1]
+
+        line = None
+        defender_wins = win_points(board, defender)
+        if len(defender_wins) < 2:
+            for move in threat_cells(board, attacker, board.win_length - 2):
+                if defender_wins and move != defender_wins[0]:
+                    continue  # Must block the defender's five first
+                if _forbidden(board, move, attacker):
+                    continue
+                line = self._after_four(board, attacker, defender, move, depth)
+                if line is not None:
+                    break
+
+        self.cache[key] = (depth, line)
+        return line
+
+    # Plays the four `move`, lets the defender block and continues the VCF
+    def _after_four(self, board, attacker, defender, move, depth):
+        self._place(board, move, attacker)
+        line = None
+        replies = win_points(board, attacker)
+        if len(replies) >= 2 or (replies and _forbidden(board, replies[0], defender)):
+            line = _unstoppable(board, move, replies, defender)
+        elif replies:
+            block = replies[0]
+            self._place(board, block, defender)
+            rest = self._vcf(board, attacker, defender, depth - 1)
+            board.undo()
+            if rest is not None:
+                line = [move, block] + rest
+        board.undo()
+        return line
+
+    def _vct(self, board, attacker, defender, depth):
+        self._tick()
+        wins = win_points(board, attacker)
+        if wins:
+            return [wins[0]]
+        key = ('vct', board.key(attacker))
+        cached = self.cache.get(key)
+        if cached is not None and (cached[1] is not None or cached[0] >= depth):
+            return cached[1]
+
+        line = self._vcf(board, attacker, defender, self.vcf_depth)
+        defender_wins = win_points(board, defender)
+        if line is None and depth > 0 and len(defender_wins) < 2:
+            fours = threat_cells(board, attacker, board.win_length - 2)
+            threes = [index for index in threat_cells(board, attacker, board.win_length - 3) if index not in fours]
+            threes.sort(key=lambda index: -move_gain(board, index, attacker))
+            for move in fours + threes:
+                if defender_wins and move != defender_wins[0]:
+                    continue
+                if _forbidden(board, move, attacker):
+                    continue
+                line = self._after_threat(board, attacker, defender, move, depth)
+                if line is not None:
+                    break
+
+        self.cache[key] = (depth, line)
+        return line
+
+    # Plays the threat `move` and checks that every defence still loses to a VCT
+    def _after_threat(self, board, attacker, defender, move, depth):
+        self._place(board, move, attacker)
+        replies = win_points(board, attacker)
+        if len(replies) >= 2 or (replies and _forbidden(board, replies[0], defender)):
+            line = _unstoppable(board, move, replies, defender)
+            board.undo()
+            return line
+        if replies:
+            defences = replies
+        elif self._vcf(board, attacker, defender, self.vcf_depth) is not None:
+            # A three: block the lines it builds or counter with a four
+            defences = sorted(set(threat_cells(board, attacker, board.win_length - 2)) |
+                              set(threat_cells(board, defender, board.win_length - 2)))
+            defences = [index for index in defences if not _forbidden(board, index, defender)]
+        else:
+            board.undo()
+            return None  # Not a real threat
+
+        line = None
+        for defence in defences:
+            self._place(board, defence, defender)
+            if board.last_move_wins():
+                rest = None
+            else:
+                rest = self._vct(board, attacker, defender, depth - 1)
+            board.undo()
+            if rest is None:
+                line = None
+                break
+            if line is None:
+                line = [move, defence] + rest
+        board.undo()
+        return line
@@ -0,0 +1,179 @@
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .board import AI, COLS, FREESTYLE, PLAYER, ROWS, RULES, Board, opponent_of
+from .engines import Engine
+from .lines import WIN_LENGTH
+from .records import GameRecord, RecordWriter
+
+OPENING_RADIUS = 3  # Random opening stones stay this close to the centre
+Z_95 = 1.96
+
+
+# Random stones around the centre, alternating colours, as a list of (row, col)
+def random_opening(rows, cols, plies, rng):
+    center_row, center_col = rows // 2, cols // 2
+    cells = [(row, col)
+             for row in range(max(0, center_row - OPENING_RADIUS), min(rows, center_row + OPENING_RADIUS + 1))
+             for col in range(max(0, center_col - OPENING_RADIUS), min(cols, center_col + OPENING_RADIUS + 1))]
+    return rng.sample(cells, min(plies, len(cells)))
+
+
+# Plays one game without any rendering. Black (PLAYER) moves first.
+def play_game(game_id, black_spec, white_spec, opening, seed, rows=ROWS, cols=COLS, win_length=WIN_LENGTH,
+              rule=FREESTYLE):
+    random.seed(seed)
+    board = Board(rows, cols, win_length, rule)
+    engines = {PLAYER: Engine(black_spec), AI: Engine(white_spec)}
+    move_time = {PLAYER: 0.0, AI: 0.0}
+    player = PLAYER
+    for row, col in opening:
+        board.place(row, col, player)
+        player = opponent_of(player)
+
+    winner = None
+    while not board.is_full():
+        start = time.perf_counter()
+        row, col = engines[player].choose_move(board, player)
+        move_time[player] += time.perf_counter() - start
+        board.place(row, col, player)
+        if board.last_move_wins():
+            winner = player
+            break
+        player = opponent_of(player)
+
+    return {
+        'game': game_id,
+        'black': black_spec,
+        'white': white_spec,
+        'winner': {PLAYER: 'black', AI: 'white', None: 'draw'}[winner],
+        'plies': len(board.history),
+        'opening_plies': len(opening),
+        'black_seconds': round(move_time[PLAYER], 4),
+        'white_seconds': round(move_time[AI], 4),
+        'moves': [[row, col] for row, col in board.history],
+    }
+
+
+# Elo difference for a score with a normal-approximation confidence interval: (elo, low, high)
+def elo_difference(wins, draws, losses, z=Z_95):
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, -math.inf, math.inf
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = z * math.sqrt(variance / games)
+
+    def to_elo(p):
+        if p <= 0:
+            return -math.inf
+        if p >= 1:
+            return math.inf
+        return -400 * math.log10(1 / p - 1)
+
+    return to_elo(score), to_elo(score - margin), to_elo(score + margin)
+
+
+# Counts results by seat: each result's 'a' is the colour engine_a played, so self-play
+# between identical specs is still told apart
+def summarize(results):
+    wins = draws = losses = 0
+    for result in results:
+        if result['winner'] == 'draw':
+            draws += 1
+        elif result['winner'] == result['a']:
+            wins += 1
+        else:
+            losses += 1
+    games = wins + draws + losses
+    elo, low, high = elo_difference(wins, draws, losses)
+    return {
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'win_rate': wins / games if games else 0.0,
+        'draw_rate': draws / games if games else 0.0,
+        'loss_rate': losses / games if games else 0.0,
+        'elo': elo,
+        'elo_low': low,
+        'elo_high': high,
+    }
+
+
+# Plays `games` games between two engine specs on a process pool. Games come in pairs that
+# share a random opening with colours swapped. Each finished game is written to `output`
+# (a file object) as one JSON line, and to `record_writer` (a RecordWriter) as a game record.
+# Returns the summary from engine_a's point of view.
+def run_tournament(engine_a, engine_b, games, workers=None, opening_plies=4, seed=0,
+                   output=None, rows=ROWS, cols=COLS, win_length=WIN_LENGTH, rule=FREESTYLE, record_writer=None):
+    Engine(engine_a), Engine(engine_b)  # Fail fast on bad specs
+    rng = random.Random(seed)
+    jobs = []
+    for game_id in range(games):
+        if game_id % 2 == 0:
+            opening = random_opening(rows, cols, opening_plies, rng)
+        black, white = (engine_a, engine_b) if game_id % 2 == 0 else (engine_b, engine_a)
+        jobs.append((game_id, black, white, opening, rng.getrandbits(32), rows, cols, win_length, rule))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, *job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            result['a'] = 'black' if result['game'] % 2 == 0 else 'white'
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+            if record_writer is not None:
+                record_writer.write(GameRecord(result['moves'], result['winner'], rows, cols, win_length, rule))
+    return summarize(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Gomoku engine tournament")
+    parser.add_argument('engine_a', help="e.g. alphabeta:depth=2")
+    parser.add_argument('engine_b', help="e.g. minimax:depth=2")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--opening-plies', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--cols', type=int, default=COLS)
+    parser.add_argument('--win-length', type=int, default=WIN_LENGTH)
+    parser.add_argument('--rule', choices=RULES, default=FREESTYLE)
+    parser.add_argument('--output', default=None, help="JSONL file for per-game results ('-' for stdout)")
+    parser.add_argument('--records', default=None, help="game record file to append the games to")
+    args = parser.parse_args(argv)
+
+    if args.output == '-':
+        output = sys.stdout
+    elif args.output:
+        output = open(args.output, 'w')
+    else:
+        output = None
+    record_writer = RecordWriter(args.records) if args.records else None
+    try:
+        summary = run_tournament(args.engine_a, args.engine_b, args.games, args.workers, args.opening_plies,
+                                 args.seed, output, args.rows, args.cols, args.win_length, args.rule, record_writer)
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+        if record_writer is not None:
+            record_writer.close()
+
+    print(f"{args.engine_a} vs {args.engine_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']} "
+          f"({summary['games']} games)", file=sys.stderr)
+    print(f"Elo {summary['elo']:+.1f} (95% CI {summary['elo_low']:+.1f} .. {summary['elo_high']:+.1f})",
+          file=sys.stderr)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import random
+from array import array
+
+# Bound types stored with each entry (0 marks an empty slot)
+EXACT, LOWER, UPPER = 1, 2, 3
+NO_MOVE = -1
+
+# key (8) + value (8) + move (4) + depth (1) + flag (1) + generation (1)
+ENTRY_BYTES = 23
+DEFAULT_TABLE_BYTES = 16 * 1024 * 1024
+
+ZOBRIST_SEED = 20240601
+_zobrist = {}
+
+
+# Fixed random keys per board size, the same in every process so hashes can be shared
+def get_zobrist_keys(rows, cols):
+    key = (rows, cols)
+    if key not in _zobrist:
+        rng = random.Random(ZOBRIST_SEED + rows * 1000 + cols)
+        cells = rows * (cols + 1)
+        piece_keys = [None] + [[rng.getrandbits(64) for _ in range(cells)] for _ in range(2)]
+        side_key = rng.getrandbits(64)
+        _zobrist[key] = (piece_keys, side_key)
+    return _zobrist[key]
+
+
+# Fixed-size table made of two-slot buckets: slot 0 keeps the deepest result
+# (or any result once its search generation is stale), slot 1 always takes the newest.
+# Values are stored from the point of view of the side to move.
+class TranspositionTable:
+    def __init__(self, max_bytes=DEFAULT_TABLE_BYTES):
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= max_bytes:
+            buckets *= 2
+        self.bucket_mask = buckets - 1
+        self.size = buckets * 2
+        self.keys = array('Q', [0]) * self.size
+        self.values = array('q', [0]) * self.size
+        self.moves = array('i', [NO_MOVE]) * self.size
+        self.depths = array('b', [0]) * self.size
+        self.flags = array('b', [0]) * self.size
+        self.generations = array('B', [0]) * self.size
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0  # Probed slots holding a different position
+        self.stores = 0
+        self.replacements = 0  # Stores that evicted a different position
+
+    def clear(self):
+        self.flags = array('b', [0]) * self.size
+        self.generation = 0
+        self.reset_stats()
+
+    # Call once per root search so entries from earlier moves age out first
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xFF
+
+    def memory_bytes(self):
+        return self.size * ENTRY_BYTES
+
+    # Returns (depth, flag, value, move) or None
+    def probe(self, key):
+        self.probes += 1
+        slot = (key & self.bucket_mask) * 2
+        for i in (slot, slot + 1):
+            if self.flags[i]:
+                if self.keys[i] == key:
+                    self.hits += 1
+                    return self.depths[i], self.flags[i], self.values[i], self.moves[i]
+                self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, flag, value, move=NO_MOVE):
+        self.stores += 1
+        slot = (key & self.bucket_mask) * 2
+        if self.flags[slot + 1] and self.keys[slot + 1] == key:
+            slot += 1
+        elif self.flags[slot] and self.keys[slot] != key and \
+                depth < self.depths[slot] and self.generations[slot] == self.generation:
+            slot += 1  # Deeper current entry stays in the first slot
+        if self.flags[slot] and self.keys[slot] != key:
+            self.replacements += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.moves[slot] = move
+        self.depths[slot] = min(depth, 127)
+        self.flags[slot] = flag
+        self.generations[slot] = self.generation
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'memory_bytes': self.memory_bytes(),
+            'probes': self.probes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+        }
@@ -0,0 +1,192 @@
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from .board import AI, COLS, FREESTYLE, PLAYER, ROWS, opponent_of
+from .evaluation import evaluate_board, score_lines_scan
+from .lines import WIN_LENGTH, get_geometry, get_score_gain, state_step, window_score
+from .positions import POSITIONS, build_board, side_to_move
+from .search import WIN_SCORE, SearchControl, alphabeta
+
+# Optional NumPy evaluator (this module needs numpy; the rest of the package does not).
+# A position is a flat int8 array in the board's bit layout (row * stride + col) holding
+# the state step of each stone, so the sum over a window is exactly the window state
+# Board keeps incrementally (PLAYER count * (win_length + 1) + AI count). Window sums for each direction
+# are five shifted slices of the array added together, which works on a whole batch of
+# positions at once; the states are then scored through the same LINE_WEIGHTS tables.
+
+
+def _score_table(win_length, scored, against=None):
+    return np.array([window_score(state, scored, win_length) -
+                     (window_score(state, against, win_length) if against else 0)
+                     for state in range((win_length + 1) ** 2)], dtype=np.int64)
+
+
+class BatchEvaluator:
+    def __init__(self, rows=ROWS, cols=COLS, win_length=WIN_LENGTH):
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.state_step = state_step(win_length)
+        self.stride = cols + 1
+        self.cells = rows * self.stride
+        # Horizontal, vertical, diagonal, anti-diagonal; the anti-diagonal runs down-left
+        # so every shift is positive
+        steps = ((0, 1), (1, 0), (1, 1), (1, -1))
+        self.directions = []
+        for d_row, d_col in steps:
+            valid = np.zeros(self.cells, dtype=bool)
+            for row in range(rows):
+                for col in range(cols):
+                    end_row = row + d_row * (win_length - 1)
+                    end_col = col + d_col * (win_length - 1)
+                    valid[row * self.stride + col] = end_row < rows and 0 <= end_col < cols
+            self.directions.append((d_row * self.stride + d_col, valid))
+        self.size = self.cells + (win_length - 1) * (self.stride + 1)  # Room for every shifted slice
+        self.score_tables = [None, _score_table(win_length, PLAYER), _score_table(win_length, AI)]
+        self.eval_tables = [None, _score_table(win_length, PLAYER, AI), _score_table(win_length, AI, PLAYER)]
+        # Windows through each cell, padded with one extra window id whose state (a full
+        # window) gains nothing, and evaluation gains self.gain_tables[mover][player][state]
+        windows, cell_windows = get_geometry(rows, cols, win_length)
+        self.padding_window = len(windows)
+        width = max(len(ids) for ids in cell_windows)
+        self.cell_windows = np.full((self.cells, width), self.padding_window, dtype=np.intp)
+        for index, ids in enumerate(cell_windows):
+            self.cell_windows[index, :len(ids)] = ids
+        score_gain = get_score_gain(win_length)
+        self.gain_tables = [None] + [
+            [None] + [np.array(score_gain[mover][scored], dtype=np.int64) -
+                      np.array(score_gain[mover][opponent_of(scored)], dtype=np.int64)
+                      for scored in (PLAYER, AI)]
+            for mover in (PLAYER, AI)]
+
+    def encode(self, board):
+        codes = np.zeros(self.size, dtype=np.int8)
+        stride = self.stride
+        for row, col in board.history:
+            codes[row * stride + col] = self.state_step[board.grid[row][col]]
+        return codes
+
+    # (N, cells) window states for each direction, with the mask of real windows
+    def _states(self, batch):
+        cells = self.cells
+        for step, valid in self.directions:
+            states = batch[:, :cells].copy()
+            for i in range(1, self.win_length):
+                states += batch[:, i * step:i * step + cells]
+            yield states, valid
+
+    def _total(self, batch, table):
+        total = np.zeros(len(batch), dtype=np.int64)
+        for states, valid in self._states(batch):
+            total += (table[states] * valid).sum(axis=1)
+        return total
+
+    # score_lines for every position of an (N, size) batch
+    def score(self, batch, player):
+        return self._total(batch, self.score_tables[player])
+
+    # evaluate_board for every position of an (N, size) batch
+    def evaluate(self, batch, player):
+        return self._total(batch, self.eval_tables[player])
+
+    def score_boards(self, boards, player):
+        return self.score(np.stack([self.encode(board) for board in boards]), player)
+
+    # Leaf scores, as alphabeta would return them at depth 0, of the positions after
+    # `to_move` plays each of `moves` on `board`, from `player`'s point of view. Only the
+    # windows through each move change, so every child is scored at once as the board's
+    # current evaluation plus the gains of those windows, read from its window states.
+    def evaluate_children(self, board, moves, to_move, player):
+        states = np.array(board.window_state + [(self.win_length + 1) ** 2 - 1])
+        stride = self.stride
+        before = states[self.cell_windows[[row * stride + col for row, col in moves]]]
+        gains = self.gain_tables[to_move][player][before].sum(axis=1)
+        wins = (before == (self.win_length - 1) * self.state_step[to_move]).any(axis=1)
+        if board.rule != FREESTYLE:
+            wins = [win and board.is_win_at(row, col, to_move) for win, (row, col) in zip(wins.tolist(), moves)]
+        win_score = WIN_SCORE if to_move == player else -WIN_SCORE
+        return np.where(wins, win_score, evaluate_board(board, player) + gains).tolist()
+
+    # Same scores as evaluate_children by rescoring every window of every child position
+    def evaluate_children_full(self, board, moves, to_move, player):
+        batch = np.repeat(self.encode(board)[np.newaxis], len(moves), axis=0)
+        stride = self.stride
+        batch[np.arange(len(moves)), [row * stride + col for row, col in moves]] = self.state_step[to_move]
+        table = self.eval_tables[player]
+        five = self.win_length * self.state_step[to_move]
+        total = np.zeros(len(moves), dtype=np.int64)
+        wins = np.zeros(len(moves), dtype=bool)
+        for states, valid in self._states(batch):
+            total += (table[states] * valid).sum(axis=1)
+            wins |= ((states == five) & valid).any(axis=1)
+        win_score = WIN_SCORE if to_move == player else -WIN_SCORE
+        return np.where(wins, win_score, total).tolist()
+
+
+REPEATS = 3
+
+
+def _best_time(function):
+    best = math.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Best-of-REPEATS time of a seeded alphabeta search, with its (row, col, score) and node count
+def _timed_search(board, player, depth, batch, seed):
+    best = math.inf
+    for _ in range(REPEATS):
+        random.seed(seed)
+        control = SearchControl()
+        start = time.perf_counter()
+        result = alphabeta(board, depth, -math.inf, math.inf, player, control=control, batch=batch)
+        best = min(best, time.perf_counter() - start)
+    return result, control.nodes, best
+
+
+# Times alphabeta with and without batched frontier evaluation on the benchmark positions,
+# plus batch scoring of all children of each position against the Python window scan
+def compare(depths=(3, 4), seed=0, out=sys.stdout):
+    evaluator = BatchEvaluator()
+    print(f"{'position':16s} {'depth':>5s} {'nodes':>8s} {'plain':>8s} {'batched':>8s} {'speedup':>8s}", file=out)
+    for position in POSITIONS:
+        board = build_board(position['moves'])
+        player = side_to_move(board)
+        for depth in depths:
+            plain, nodes, plain_time = _timed_search(board, player, depth, None, seed)
+            batched, _, batched_time = _timed_search(board, player, depth, evaluator, seed)
+            if batched[2] != plain[2]:
+                raise AssertionError(f"{position['name']}: batched score {batched[2]} != {plain[2]}")
+            print(f"{position['name']:16s} {depth:5d} {nodes:8d} {plain_time:8.3f} {batched_time:8.3f} "
+                  f"{plain_time / batched_time:7.2f}x", file=out)
+
+    moves_scored = scan_time = batch_time = 0
+    for position in POSITIONS:
+        board = build_board(position['moves'])
+        player = side_to_move(board)
+        moves = [divmod(index, board.stride) for index in sorted(board.candidates)]
+        if evaluator.evaluate_children(board, moves, player, player) != \
+                evaluator.evaluate_children_full(board, moves, player, player):
+            raise AssertionError(f"{position['name']}: incremental and full batch scores differ")
+
+        def scan():
+            for row, col in moves:
+                board.place(row, col, player)
+                score_lines_scan(board, player) - score_lines_scan(board, opponent_of(player))
+                board.undo()
+        scan_time += _best_time(scan)
+        batch_time += _best_time(lambda: evaluator.evaluate_children_full(board, moves, player, player))
+        moves_scored += len(moves)
+    print(f"Scoring {moves_scored} children: window scan {scan_time:.3f}s, batch {batch_time:.3f}s "
+          f"({scan_time / batch_time:.1f}x)", file=out)
+
+
+if __name__ == "__main__":
+    compare()
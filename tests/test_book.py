@@ -0,0 +1,61 @@
+import pytest
+
+from gomoku_engine import AI, PLAYER, RENJU, Board, OpeningBook, canonical_key, get_symmetries, write_book
+
+# An asymmetric opening, so no symmetry maps it onto itself
+OPENING = [(7, 7, PLAYER), (7, 8, AI), (9, 6, PLAYER)]
+REPLY = (6, 9)
+
+
+def transformed_board(mapping, cols, rule='freestyle'):
+    board = Board(rule=rule)
+    for row, col, player in OPENING:
+        board.place(*divmod(mapping[row * cols + col], cols), player)
+    return board
+
+
+# Stores REPLY for OPENING in the canonical frame, as build_book does
+def write_opening_book(path, rule='freestyle'):
+    board = Board(rule=rule)
+    for row, col, player in OPENING:
+        board.place(row, col, player)
+    symmetries = get_symmetries(board.rows, board.cols)
+    key, number = canonical_key(board, AI, symmetries)
+    write_book(path, {key: (symmetries[number][REPLY[0] * board.cols + REPLY[1]], 42)}, rule=rule)
+
+
+def test_lookup_under_all_eight_symmetries(tmp_path):
+    path = tmp_path / 'book.bin'
+    write_opening_book(path)
+    symmetries = get_symmetries(15, 15)
+    assert len(symmetries) == 8
+    with OpeningBook(path) as book:
+        assert len(book) == 1
+        for mapping in symmetries:
+            board = transformed_board(mapping, 15)
+            expected = divmod(mapping[REPLY[0] * 15 + REPLY[1]], 15)
+            assert book.lookup(board, AI) == (*expected, 42)
+        assert book.hits == 8
+
+
+def test_lookup_misses_other_positions_sides_and_rules(tmp_path):
+    path = tmp_path / 'book.bin'
+    write_opening_book(path)
+    with OpeningBook(path) as book:
+        board = transformed_board(get_symmetries(15, 15)[0], 15)
+        assert book.lookup(board, PLAYER) is None
+        board.undo()
+        assert book.lookup(board, PLAYER) is None
+        assert book.lookup(transformed_board(get_symmetries(15, 15)[0], 15, RENJU), AI) is None
+        assert book.misses == 2  # Another rule is not looked up at all
+
+
+def test_rectangular_boards_keep_four_symmetries():
+    assert len(get_symmetries(10, 15)) == 4
+
+
+def test_rejects_files_that_are_not_books(tmp_path):
+    path = tmp_path / 'book.bin'
+    path.write_bytes(b'not a book at all')
+    with pytest.raises(ValueError):
+        OpeningBook(path)
@@ -0,0 +1,61 @@
+from gomoku_engine import AI, PLAYER, RENJU, Board, MoveOrderer, get_valid_moves, move_gain
+
+
+def make_board(stones, rule='freestyle'):
+    board = Board(rule=rule)
+    for row, col, player in stones:
+        board.place(row, col, player)
+    return board
+
+
+def test_winning_move_comes_first():
+    # AI has four in a row on row 7 with one end blocked, so (7, 5) wins
+    board = make_board([(7, 6, AI), (8, 8, PLAYER), (7, 7, AI), (9, 9, PLAYER), (7, 8, AI),
+                        (10, 10, PLAYER), (7, 9, AI), (7, 10, PLAYER)])
+    moves = MoveOrderer().order(board, AI)
+    assert moves[0] == (7, 5)
+    assert sorted(moves) == sorted(get_valid_moves(board))
+
+
+def test_blocking_move_beats_quiet_moves():
+    # PLAYER threatens five at (7, 5); AI has nothing better to do than block it
+    board = make_board([(7, 6, PLAYER), (0, 0, AI), (7, 7, PLAYER), (0, 14, AI), (7, 8, PLAYER),
+                        (14, 0, AI), (7, 9, PLAYER), (7, 10, AI)])
+    assert MoveOrderer().order(board, AI)[0] == (7, 5)
+
+
+def test_order_follows_move_gain():
+    board = make_board([(7, 7, PLAYER), (8, 8, AI), (7, 8, PLAYER)])
+    moves = MoveOrderer().order(board, AI)
+    gains = [move_gain(board, row * board.stride + col, AI) for row, col in moves]
+    assert gains == sorted(gains, reverse=True)
+
+
+def test_tt_move_and_killers_jump_the_queue():
+    board = make_board([(7, 7, PLAYER), (8, 8, AI), (7, 8, PLAYER)])
+    orderer = MoveOrderer()
+    last = orderer.order(board, AI)[-1]
+    tt_move = last[0] * board.stride + last[1]
+    assert orderer.order(board, AI, tt_move)[0] == last
+
+    quiet = orderer.order(board, AI)[-1]
+    orderer.cutoff(board, AI, *quiet, 1)
+    assert orderer.order(board, AI).index(quiet) < len(orderer.order(board, AI)) - 1
+    orderer.new_search()
+    assert orderer.killers == {}
+
+
+def test_beam_width_keeps_the_best_moves():
+    board = make_board([(7, 7, PLAYER), (8, 8, AI), (7, 8, PLAYER)])
+    full = MoveOrderer().order(board, AI)
+    assert MoveOrderer(beam_width=3).order(board, AI) == full[:3]
+
+
+def test_renju_leaves_out_forbidden_moves():
+    # (7, 6) would give black six in a row
+    board = make_board([(7, 3, PLAYER), (0, 0, AI), (7, 4, PLAYER), (0, 2, AI), (7, 5, PLAYER),
+                        (0, 4, AI), (7, 7, PLAYER), (0, 6, AI), (7, 8, PLAYER), (0, 8, AI)], rule=RENJU)
+    assert board.is_forbidden(7, 6, PLAYER)
+    moves = MoveOrderer().order(board, PLAYER)
+    assert (7, 6) not in moves
+    assert moves
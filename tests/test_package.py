@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+
+
+# Books, records, pattern training and parallel search load on first use only
+def test_import_stays_light():
+    loaded = run_python("import sys, gomoku_engine; "
+                        "print(*[name in sys.modules for name in ('multiprocessing', 'concurrent.futures', "
+                        "'argparse', 'gomoku_engine.records', 'gomoku_engine.patterns')])")
+    assert loaded == ['False'] * 5
+
+
+def test_lazy_names_resolve_and_star_import():
+    import gomoku_engine
+    from gomoku_engine.records import GameRecord
+    assert gomoku_engine.GameRecord is GameRecord
+    assert 'GameRecord' in dir(gomoku_engine)
+    names = run_python("from gomoku_engine import *; print(GameRecord.__name__, Engine.__name__, "
+                       "default_pattern_table.__name__)")
+    assert names == ['GameRecord', 'Engine', 'default_pattern_table']
@@ -0,0 +1,19 @@
+from gomoku_engine import ParallelSearcher, position_boards, side_to_move
+
+
+def search_all(workers, seed):
+    with ParallelSearcher(workers, seed=seed) as searcher:
+        results = []
+        # Deeper searches first, so workers hold entries from earlier tasks when later ones run
+        for depth in (3, 2):
+            for board in position_boards():
+                result = searcher.search(board, side_to_move(board), depth)
+                results.append((result.row, result.col, result.score))
+        return results
+
+
+# The same seed gives the same moves and scores whatever the number of workers
+def test_parallel_search_is_deterministic_across_worker_counts():
+    expected = search_all(1, seed=5)
+    assert search_all(2, seed=5) == expected
+    assert search_all(4, seed=5) == expected
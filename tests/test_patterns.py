@@ -0,0 +1,107 @@
+import math
+import random
+
+import pytest
+
+from gomoku_engine import (
+    AI,
+    PLAYER,
+    Board,
+    Engine,
+    alphabeta,
+    default_pattern_table,
+    get_valid_moves,
+    opponent_of,
+    patterns,
+    score_lines,
+    score_lines_scan,
+)
+
+
+def random_game(board, rng, plies):
+    player = PLAYER
+    for _ in range(plies):
+        if board.history and rng.random() < 0.25:
+            board.undo()
+        else:
+            row, col = rng.choice(get_valid_moves(board))
+            board.place(row, col, player)
+        player = opponent_of(board.last_player()) if board.history else PLAYER
+
+
+# The pattern state kept through place/undo matches one built from scratch
+def test_incremental_patterns_match_rebuild():
+    table = default_pattern_table()
+    rng = random.Random(7)
+    for _ in range(20):
+        board = Board()
+        board.use_patterns(table)
+        random_game(board, rng, rng.randint(5, 60))
+        fresh = Board()
+        for row, col in board.history:
+            fresh.place(row, col, board[row][col])
+        fresh.use_patterns(table)
+        assert fresh.patterns.codes == board.patterns.codes
+        for player in (PLAYER, AI):
+            assert fresh.patterns.evaluate(player) == board.patterns.evaluate(player)
+        copied = board.copy()
+        assert copied.patterns.evaluate(PLAYER) == board.patterns.evaluate(PLAYER)
+
+
+# Line scores are not kept while a pattern table is in use and come back when it is dropped
+def test_line_scores_rebuilt_after_patterns():
+    rng = random.Random(8)
+    board = Board()
+    board.use_patterns(default_pattern_table())
+    random_game(board, rng, 40)
+    board.use_patterns(None)
+    for player in (PLAYER, AI):
+        assert score_lines(board, player) == score_lines_scan(board, player)
+
+
+# Weights trained for five in a row are not used on other win lengths
+def test_engine_falls_back_to_line_scores_for_other_win_lengths():
+    engine = Engine('alphabeta:depth=1,patterns=1')
+    board = Board(15, 15, 4)
+    board.place(7, 7, PLAYER)
+    engine.choose_move(board, AI)
+    assert board.patterns is None
+
+
+# Batched leaf scores use line weights, so alphabeta refuses them next to pattern evaluation
+def test_alphabeta_rejects_batch_with_patterns():
+    pytest.importorskip('numpy')
+    from gomoku_engine.vectorized import BatchEvaluator
+    board = Board()
+    board.place(7, 7, PLAYER)
+    board.use_patterns(default_pattern_table())
+    with pytest.raises(ValueError):
+        alphabeta(board, 2, -math.inf, math.inf, AI, batch=BatchEvaluator())
+
+
+# Sum of the segment values straight from the grid, for the side to move
+def scan_patterns(board, table, to_move):
+    total = 0
+    for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+        for row in range(board.rows):
+            for col in range(board.cols):
+                cells = [(row + d_row * i, col + d_col * i) for i in range(table.length)]
+                if all(0 <= r < board.rows and 0 <= c < board.cols for r, c in cells):
+                    code = sum(board[r][c] * 3 ** i for i, (r, c) in enumerate(cells))
+                    total += table.values[to_move][code]
+    return total
+
+
+# Cached line values add up to the segment values, also when the cache starts over mid-game
+def test_line_values_match_segment_scan(monkeypatch):
+    monkeypatch.setattr(patterns, 'MAX_LINE_CACHE', 50)
+    table = default_pattern_table()
+    rng = random.Random(9)
+    for rows, cols in ((15, 15), (9, 13)):
+        board = Board(rows, cols)
+        board.use_patterns(table)
+        random_game(board, rng, 50)
+        to_move = opponent_of(board.last_player()) if board.history else PLAYER
+        assert board.patterns.evaluate(to_move) == scan_patterns(board, table, to_move)
+        assert board.patterns.evaluate(opponent_of(to_move)) == -scan_patterns(board, table, to_move)
+    assert all(len(cache) <= 50 for cache in table.line_caches.values())
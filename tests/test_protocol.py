@@ -0,0 +1,98 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from gomoku_engine import AI, EXACT_FIVE, PLAYER, RENJU
+from gomoku_engine.protocol import ABOUT, SEARCH, Session, run_session, search_move
+
+SPEC = 'alphabeta:depth=1'
+
+
+# Feeds `lines` to a session and returns every answer line, searching moves in threads
+def run_script(lines, spec=SPEC):
+    script = iter(lines)
+    answers = []
+    session = Session(spec)
+
+    async def read_line():
+        return next(script, None)
+
+    async def write_line(text):
+        answers.append(text)
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            await run_session(session, read_line, write_line, pool)
+
+    asyncio.run(main())
+    return session, answers
+
+
+def parse_move(text):
+    x, y = (int(value) for value in text.split(','))
+    return y, x
+
+
+def test_scripted_game():
+    session, answers = run_script(['ABOUT', 'START 15', 'BEGIN', 'TURN 7,8', 'END', 'TURN 1,1'])
+    assert answers[:2] == [ABOUT, 'OK']
+    first, second = parse_move(answers[2]), parse_move(answers[3])
+    board = session.board
+    assert board[first[0]][first[1]] == PLAYER
+    assert board[8][7] == AI
+    assert board[second[0]][second[1]] == PLAYER
+    assert len(answers) == 4 and session.ended  # Lines after END are not read
+
+
+def test_board_command_with_spaces_and_takeback():
+    session = Session(SPEC)
+    assert session.handle('START 15') == ['OK']
+    assert session.handle('BOARD') == []
+    for line in ['7,7,2', ' 8, 7, 1 ', '7,8,2']:
+        assert session.handle(line) == []
+    assert session.handle('DONE') == SEARCH
+    # The opponent has one stone more, so it moved first (black) and we play white
+    assert session.board[7][7] == PLAYER and session.board[7][8] == AI and session.board[8][7] == PLAYER
+    assert session.to_move() == AI
+    assert session.handle('TAKEBACK 8,7') == ['OK']
+    assert session.board[7][8] == 0 and len(session.board.history) == 2
+    assert session.handle('BOARD') == []
+    assert session.handle('x,y,z') == ['ERROR bad BOARD line: x,y,z']
+
+
+def test_search_request_answers_a_legal_move():
+    session = Session(SPEC)
+    session.handle('START 15')
+    assert session.handle('TURN 7,7') == SEARCH
+    row, col = search_move(*session.search_request())
+    answer = session.play(row, col)
+    assert parse_move(answer) == (row, col)
+    assert session.board[row][col] == AI
+
+
+def test_info_rule_and_time_controls():
+    session = Session(SPEC)
+    session.handle('INFO rule 4')
+    session.handle('START 15')
+    assert session.board.rule == RENJU
+    session.handle('INFO rule 1')
+    assert session.board.rule == EXACT_FIVE
+    session.handle('INFO timeout_turn 2000')
+    assert session.move_seconds() == 2.0 - 0.1
+    session.handle('INFO time_left 10000')
+    assert session.move_seconds() == 10.0 / 20
+    session.handle('INFO folder C:\\games')
+
+
+def test_errors():
+    session = Session(SPEC)
+    assert session.handle('BEGIN') == ["ERROR no board, send START first"]
+    assert session.handle('START 4')[0].startswith('ERROR')
+    assert session.handle('START x') == ["ERROR bad arguments for START: x"]
+    assert session.handle('RECTSTART 20,15') == ['OK']
+    assert (session.board.rows, session.board.cols) == (15, 20)
+    session.handle('TURN 3,3')
+    assert session.handle('TURN 3,3') == ["ERROR invalid move 3,3"]
+    assert session.handle('TURN 3') == ["ERROR bad arguments for TURN: 3"]
+    assert session.handle('JUMP') == ["UNKNOWN JUMP"]
+    assert session.handle('') == []
+    assert session.handle('RESTART') == ['OK'] and not session.board.history
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from gomoku_engine import (
+    AI,
+    PLAYER,
+    WIN_SCORE,
+    Board,
+    SearchControl,
+    SearchStats,
+    TranspositionTable,
+    alphabeta,
+    iterative_deepening,
+    position_boards,
+    pvs,
+    side_to_move,
+)
+from gomoku_engine.search import _aspiration_search
+
+
+# Without late-move reductions (depth 2 is below LMR_MIN_DEPTH) PVS must agree with alphabeta
+@pytest.mark.parametrize('depth', [1, 2])
+def test_pvs_matches_alphabeta(depth):
+    for board in position_boards():
+        player = side_to_move(board)
+        expected = alphabeta(board, depth, -math.inf, math.inf, player, deterministic=True)[2]
+        assert pvs(board, depth, -math.inf, math.inf, player)[2] == expected
+        assert pvs(board, depth, -math.inf, math.inf, player, TranspositionTable())[2] == expected
+
+
+# A null window proves which side of it the true score lies on
+def test_null_window_bounds_the_score():
+    board = position_boards('midgame')[0]
+    player = side_to_move(board)
+    score = pvs(board, 2, -math.inf, math.inf, player)[2]
+    assert pvs(board, 2, score - 1, score, player)[2] >= score
+    assert pvs(board, 2, score, score + 1, player)[2] <= score
+
+
+# However far off the guess is, the widened windows end on the full-window score
+def test_aspiration_widens_to_the_true_score():
+    board = position_boards('midgame')[0]
+    player = side_to_move(board)
+    expected = pvs(board, 2, -math.inf, math.inf, player)[2]
+    for guess in (expected, expected + 10000, expected - 10000, expected + 90000, None):
+        stats = SearchStats()
+        control = SearchControl(stats=stats)
+        assert _aspiration_search(board, 2, player, guess, None, control, None)[2] == expected
+        if guess == expected:
+            assert stats.aspiration_fails == 0
+        elif guess is not None:
+            assert stats.aspiration_fails > 0
+
+
+def test_pvs_search_finds_the_win():
+    board = Board()
+    for row, col, player in [(7, 5, AI), (0, 0, PLAYER), (7, 6, AI), (0, 14, PLAYER), (7, 7, AI), (14, 0, PLAYER)]:
+        board.place(row, col, player)
+    result = iterative_deepening(board, AI, max_depth=4, use_pvs=True)
+    assert result.score >= WIN_SCORE
+    assert (result.row, result.col) in ((7, 4), (7, 8))
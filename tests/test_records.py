@@ -0,0 +1,79 @@
+import pytest
+
+from gomoku_engine import (
+    AI,
+    PLAYER,
+    Board,
+    GameRecord,
+    RecordWriter,
+    Replay,
+    analyze_records,
+    board_result,
+    move_to_text,
+    read_records,
+    text_to_move,
+)
+
+
+def test_move_text_round_trip_past_column_z():
+    assert move_to_text(7, 7) == 'h8'
+    assert move_to_text(0, 25) == 'z1'
+    assert move_to_text(0, 26) == 'aa1'
+    assert move_to_text(29, 52) == 'ba30'
+    for row, col in [(0, 0), (14, 14), (3, 25), (3, 26), (40, 27), (0, 701), (0, 702)]:
+        assert text_to_move(move_to_text(row, col)) == (row, col)
+
+
+@pytest.mark.parametrize('text', ['', 'h', '8', 'H8', '8h', 'h-1', 'h8x'])
+def test_bad_move_text(text):
+    with pytest.raises(ValueError):
+        text_to_move(text)
+
+
+def test_record_line_round_trip():
+    record = GameRecord([(7, 7), (8, 8), (7, 8)], '*', 30, 30, 5, 'renju')
+    record.moves.append((0, 29))
+    line = record.to_line()
+    assert line == '30x30 5 renju * h8 i9 i8 ad1'
+    again = GameRecord.from_line(line)
+    assert again.moves == record.moves
+    assert (again.rows, again.cols, again.win_length, again.rule, again.result) == (30, 30, 5, 'renju', '*')
+    with pytest.raises(ValueError):
+        GameRecord.from_line('15x15 5 freestyle maybe h8')
+    with pytest.raises(ValueError):
+        GameRecord.from_line('h8 i9')
+
+
+def test_writer_and_reader_round_trip(tmp_path):
+    path = tmp_path / 'games.txt'
+    records = [GameRecord([(7, 7), (7, 8)]), GameRecord([(0, 0)], 'black', 10, 28, 4)]
+    with RecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    with open(path, 'a') as record_file:
+        record_file.write('\n# a comment\n')
+    assert [record.to_line() for record in read_records(path)] == [record.to_line() for record in records]
+
+
+def test_replay_moves_one_board_back_and_forth():
+    moves = [(7, 3), (8, 3), (7, 4), (8, 4), (7, 5), (8, 5), (7, 6), (8, 6), (7, 7)]
+    record = GameRecord(moves, 'black')
+    replay = Replay(record)
+    board = replay.seek(len(moves))
+    assert board.history == moves
+    assert board_result(board) == 'black'
+    assert replay.seek(2) is board and board.history == moves[:2]
+    assert board[8][3] == AI and board[7][3] == PLAYER
+    assert replay.back() and replay.ply() == 1
+    assert [ply for ply, _, _, _ in replay.positions(5)] == [5, 6, 7, 8]
+    assert not replay.forward()
+    assert GameRecord.from_board(board).to_line() == record.to_line()
+
+
+def test_analysis_covers_every_position(tmp_path):
+    records = [GameRecord([(3, 3), (4, 4), (3, 4)], '*', 7, 7, 4), GameRecord([(3, 3)], '*', 7, 7, 4)]
+    analyses = analyze_records(records, depth=1, workers=1)
+    assert [analysis['game'] for analysis in analyses] == [0, 1]
+    assert [len(analysis['plies']) for analysis in analyses] == [3, 1]
+    assert analyses[0]['plies'][1]['played'] == 'e5'
+    assert board_result(Board(3, 3, 3)) == '*'
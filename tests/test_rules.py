@@ -0,0 +1,55 @@
+from gomoku_engine import AI, EXACT_FIVE, FREESTYLE, PLAYER, RENJU, Board
+
+
+def make_board(black, white=(), rule=RENJU):
+    board = Board(rule=rule)
+    for row, col in black:
+        board.place(row, col, PLAYER)
+    for row, col in white:
+        board.place(row, col, AI)
+    return board
+
+
+def test_overline_is_forbidden_for_black_only():
+    board = make_board([(7, 3), (7, 4), (7, 5), (7, 7), (7, 8)])
+    assert board.is_forbidden(7, 6, PLAYER)
+    assert not board.is_forbidden(7, 6, AI)
+    assert not make_board([(7, 3), (7, 4), (7, 5), (7, 7), (7, 8)], rule=FREESTYLE).is_forbidden(7, 6, PLAYER)
+
+
+def test_double_three_is_forbidden():
+    board = make_board([(7, 5), (7, 6), (5, 7), (6, 7)])
+    assert board.is_forbidden(7, 7, PLAYER)
+    # One open three alone is fine
+    assert not make_board([(7, 5), (7, 6), (5, 7)]).is_forbidden(7, 7, PLAYER)
+
+
+def test_double_four_in_two_lines_is_forbidden():
+    board = make_board([(7, 4), (7, 5), (7, 6), (4, 7), (5, 7), (6, 7)], [(7, 3), (3, 7)])
+    assert board.is_forbidden(7, 7, PLAYER)
+
+
+# x_xxx_x: the move at (7, 6) makes two separate fours in the same row
+def test_double_four_in_one_line_is_forbidden():
+    board = make_board([(7, 2), (7, 4), (7, 5), (7, 8)])
+    assert board.is_forbidden(7, 6, PLAYER)
+
+
+# An open four has two five points but is a single four
+def test_open_four_is_allowed():
+    board = make_board([(7, 4), (7, 5), (7, 6)])
+    assert not board.is_forbidden(7, 7, PLAYER)
+
+
+def test_five_wins_even_when_it_makes_another_threat():
+    board = make_board([(7, 3), (7, 4), (7, 5), (7, 6), (4, 7), (5, 7), (6, 7)])
+    assert not board.is_forbidden(7, 7, PLAYER)
+    board.place(7, 7, PLAYER)
+    assert board.last_move_wins()
+
+
+def test_exact_five_does_not_count_overlines():
+    board = make_board([(7, 3), (7, 4), (7, 5), (7, 7), (7, 8)], rule=EXACT_FIVE)
+    board.place(7, 6, PLAYER)
+    assert not board.last_move_wins()
+    assert not board.is_forbidden(7, 9, PLAYER)
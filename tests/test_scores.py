@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from gomoku_engine import AI, PLAYER, Board, get_valid_moves, opponent_of, score_lines, score_lines_scan
+
+
+def assert_scores_match(board):
+    for player in (PLAYER, AI):
+        assert score_lines(board, player) == score_lines_scan(board, player)
+
+
+# Random games with take-backs: the incremental line scores must match a full rescan after
+# every place and every undo
+@pytest.mark.parametrize('rows, cols, win_length', [(15, 15, 5), (9, 9, 4), (19, 19, 6), (7, 12, 5), (10, 6, 3)])
+def test_incremental_scores_match_rescan(rows, cols, win_length):
+    rng = random.Random(rows * 100 + cols * 10 + win_length)
+    for _ in range(5):
+        board = Board(rows, cols, win_length)
+        player = PLAYER
+        for _ in range(rng.randint(10, rows * cols)):
+            if board.is_full():
+                break
+            if board.history and rng.random() < 0.25:
+                board.undo()
+                player = opponent_of(player)
+            else:
+                row, col = rng.choice(get_valid_moves(board))
+                board.place(row, col, player)
+                player = opponent_of(player)
+            assert_scores_match(board)
+        while board.history:
+            board.undo()
+            assert_scores_match(board)
+        assert score_lines(board, PLAYER) == score_lines(board, AI) == 0
@@ -0,0 +1,58 @@
+from gomoku_engine import AI, PLAYER, Board, ThreatSolver, iterative_deepening, opponent_of
+
+
+def make_board(stones):
+    board = Board()
+    for row, col, player in stones:
+        board.place(row, col, player)
+    return board
+
+
+# Plays `line` with the sides alternating from `player` and returns True if its last move wins
+def line_wins(board, player, line):
+    for row, col in line:
+        assert board.is_valid_move(row, col)
+        board.place(row, col, player)
+        player = opponent_of(player)
+    won = board.last_move_wins()
+    for _ in line:
+        board.undo()
+    return won
+
+
+def test_open_four_line_alternates_sides():
+    # AI's open three on row 7 becomes an open four; the defender blocks one end, AI wins at the other
+    board = make_board([(7, 5, AI), (0, 0, PLAYER), (7, 6, AI), (0, 14, PLAYER), (7, 7, AI), (14, 0, PLAYER)])
+    line = ThreatSolver().solve_vcf(board, AI)
+    assert line is not None and len(line) == 3
+    assert line_wins(board, AI, line)
+
+
+def test_vcf_through_a_blocked_four():
+    # A closed four on row 8 forces (8, 11), then (5, 5) makes an open four on the diagonal
+    board = make_board([(6, 6, AI), (5, 10, PLAYER), (7, 7, AI), (7, 10, PLAYER), (8, 7, AI),
+                        (9, 10, PLAYER), (8, 9, AI), (8, 4, PLAYER), (8, 10, AI), (8, 6, PLAYER)])
+    line = ThreatSolver().solve_vcf(board, AI)
+    assert line is not None
+    assert line[:3] == [(8, 8), (8, 11), (5, 5)] and len(line) == 5
+    assert line_wins(board, AI, line)
+
+
+def test_vcf_refuted_when_there_are_no_fours():
+    board = make_board([(7, 6, AI), (7, 7, PLAYER), (8, 6, AI), (6, 6, PLAYER)])
+    assert ThreatSolver().solve_vcf(board, AI) is None
+
+
+def test_vcf_must_answer_the_defenders_five():
+    # AI's open three would make an open four, but PLAYER threatens five at (10, 5) and blocking it is no four
+    board = make_board([(7, 5, AI), (10, 1, PLAYER), (7, 6, AI), (10, 2, PLAYER), (7, 7, AI), (10, 3, PLAYER),
+                        (10, 0, AI), (10, 4, PLAYER)])
+    assert ThreatSolver().solve_vcf(board, AI) is None
+
+
+def test_search_reports_the_solver_line_as_its_pv():
+    board = make_board([(7, 5, AI), (0, 0, PLAYER), (7, 6, AI), (0, 14, PLAYER), (7, 7, AI), (14, 0, PLAYER)])
+    result = iterative_deepening(board, AI, max_depth=2, threat_solver=ThreatSolver())
+    assert result.depth == len(result.pv) == 3
+    assert (result.row, result.col) == result.pv[0]
+    assert line_wins(board, AI, result.pv)
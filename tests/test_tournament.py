@@ -0,0 +1,44 @@
+import math
+
+from gomoku_engine.tournament import elo_difference, run_tournament, summarize
+
+
+def test_even_score_is_zero_elo_inside_its_interval():
+    elo, low, high = elo_difference(30, 40, 30)
+    assert elo == 0
+    assert low < 0 < high
+    assert math.isclose(low, -high)
+
+
+def test_elo_grows_with_the_score_and_the_interval_shrinks_with_games():
+    elo, low, high = elo_difference(60, 0, 40)
+    assert 60 < elo < 80  # 400 * log10(0.6 / 0.4) is about 70
+    assert low < elo < high
+    _, more_low, more_high = elo_difference(600, 0, 400)
+    assert more_high - more_low < high - low
+
+
+def test_elo_edge_cases():
+    assert elo_difference(0, 0, 0) == (0.0, -math.inf, math.inf)
+    assert elo_difference(10, 0, 0)[0] == math.inf
+    assert elo_difference(0, 0, 10)[0] == -math.inf
+
+
+# Identical specs in self-play: wins are told apart by seat, not by spec text
+def test_summarize_counts_by_seat():
+    results = [
+        {'black': 'id:depth=1', 'white': 'id:depth=1', 'winner': 'black', 'a': 'black'},
+        {'black': 'id:depth=1', 'white': 'id:depth=1', 'winner': 'black', 'a': 'white'},
+        {'black': 'id:depth=1', 'white': 'id:depth=1', 'winner': 'white', 'a': 'white'},
+        {'black': 'id:depth=1', 'white': 'id:depth=1', 'winner': 'draw', 'a': 'black'},
+    ]
+    summary = summarize(results)
+    assert (summary['wins'], summary['draws'], summary['losses']) == (2, 1, 1)
+    assert summary['games'] == 4 and summary['win_rate'] == 0.5
+
+
+def test_small_tournament_adds_up():
+    summary = run_tournament('alphabeta:depth=1', 'minimax:depth=1', 2, workers=1, opening_plies=2, seed=1,
+                             rows=7, cols=7, win_length=4)
+    assert summary['games'] == 2
+    assert summary['wins'] + summary['draws'] + summary['losses'] == 2
@@ -0,0 +1,64 @@
+import math
+
+from gomoku_engine import AI, EXACT, LOWER, PLAYER, UPPER, Board, TranspositionTable, alphabeta
+from gomoku_engine.transposition import ENTRY_BYTES, NO_MOVE
+
+
+def test_store_and_probe_keep_depth_flag_value_and_move():
+    tt = TranspositionTable(1024 * 1024)
+    tt.store(12345, 3, LOWER, -250, 17)
+    assert tt.probe(12345) == (3, LOWER, -250, 17)
+    assert tt.probe(54321) is None
+    assert tt.hits == 1 and tt.misses == 1
+
+
+def test_table_stays_within_its_byte_budget():
+    for max_bytes in (4096, 1024 * 1024, 16 * 1024 * 1024):
+        tt = TranspositionTable(max_bytes)
+        assert tt.memory_bytes() <= max_bytes
+        assert tt.size * ENTRY_BYTES == tt.memory_bytes()
+
+
+# Keys that fall in the same two-slot bucket: the deeper entry stays, the newest takes the
+# other slot, and a third position pushes out the shallow one
+def test_bucket_replacement_keeps_the_deepest_entry():
+    tt = TranspositionTable(4096)
+    bucket_step = tt.bucket_mask + 1
+    deep, shallow, newest = 5, 5 + bucket_step, 5 + 2 * bucket_step
+    tt.store(deep, 6, EXACT, 10)
+    tt.store(shallow, 1, UPPER, 20)
+    tt.store(newest, 2, LOWER, 30)
+    assert tt.probe(deep) == (6, EXACT, 10, NO_MOVE)
+    assert tt.probe(shallow) is None
+    assert tt.probe(newest) == (2, LOWER, 30, NO_MOVE)
+    assert tt.replacements == 1
+
+
+def test_stale_deep_entries_give_way_in_a_new_search():
+    tt = TranspositionTable(4096)
+    bucket_step = tt.bucket_mask + 1
+    tt.store(7, 8, EXACT, 1)
+    tt.new_search()
+    tt.store(7 + bucket_step, 1, EXACT, 2)
+    tt.store(7 + 2 * bucket_step, 1, EXACT, 3)
+    assert tt.probe(7) is None
+
+
+def test_depth_is_capped_and_clear_empties_the_table():
+    tt = TranspositionTable(4096)
+    tt.store(99, 500, EXACT, 0)
+    assert tt.probe(99)[0] == 127
+    tt.clear()
+    assert tt.probe(99) is None
+
+
+# The side to move is part of the key, and a search with a table gives the same score as one
+# without
+def test_keys_and_search_results():
+    board = Board()
+    board.place(7, 7, PLAYER)
+    board.place(7, 8, AI)
+    assert board.key(PLAYER) != board.key(AI)
+    plain = alphabeta(board, 3, -math.inf, math.inf, PLAYER, deterministic=True)
+    cached = alphabeta(board, 3, -math.inf, math.inf, PLAYER, tt=TranspositionTable(), deterministic=True)
+    assert plain[2] == cached[2]